@@ -0,0 +1,251 @@
+import argparse
+import json
+import os
+import socket
+from datetime import datetime
+
+from kitchen_core import STATUS_ORDER, VOID_STATUS
+from order_index import now_stamp
+from order_records import record_json
+from order_store import file_size, open_store
+
+ACTION_LOG = "actions.jsonl"
+CHECKPOINT_DIR = "checkpoints"
+# Replay leaves a checkpoint behind every this many events, so the next
+# replay to a later point starts there instead of at the top of the log.
+CHECKPOINT_EVERY = 2000
+UNDO_LIMIT = 200
+
+
+def terminal_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def inverse(event):
+    action = event["action"]
+    if action == "cart_add":
+        return dict(event, action="cart_remove")
+    if action == "cart_remove":
+        return dict(event, action="cart_add")
+    if action == "move":
+        return dict(event, **{"from": event["to"], "to": event["from"]})
+    if action == "finalize":
+        return dict(event, action="void")
+    if action == "void":
+        return dict(event, action="finalize")
+    raise ValueError(f"Cannot undo {action}")
+
+
+class ActionLog:
+    # Append-only JSON Lines record of every cart and board action at every
+    # terminal. Each event is one O_APPEND write, so the counter and the
+    # board can share the file.
+    def __init__(self, path=ACTION_LOG, terminal=None):
+        self.path = path
+        self.terminal = terminal or terminal_name()
+
+    def record(self, event):
+        event = dict(event, at=now_stamp(), terminal=self.terminal)
+        data = (json.dumps(event, separators=(",", ":"), default=record_json) + "\n").encode("utf-8")
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        return event
+
+
+class UndoStack:
+    # Both stacks hold events in the form they were last applied. Undo hands
+    # back the inverse of the newest one and redo re-applies what undo
+    # reversed; the caller applies either like any other action, so nothing
+    # is ever reloaded.
+    def __init__(self, limit=UNDO_LIMIT):
+        self.limit = limit
+        self.done = []
+        self.undone = []
+
+    def push(self, event):
+        self.done.append(event)
+        del self.done[:-self.limit]
+        self.undone.clear()
+
+    def undo(self):
+        if not self.done:
+            return None
+        event = inverse(self.done.pop())
+        self.undone.append(event)
+        return event
+
+    def redo(self):
+        if not self.undone:
+            return None
+        event = inverse(self.undone.pop())
+        self.done.append(event)
+        return event
+
+    def drop(self, actions):
+        # Events that can no longer be applied, such as the cart edits behind
+        # an order that has been finalized, come off both stacks.
+        for stack in (self.done, self.undone):
+            stack[:] = [event for event in stack if event["action"] not in actions]
+
+    def discard(self, event):
+        # An undo or redo that could not be applied (the order was moved
+        # since at another terminal) is dropped rather than left to fail again.
+        for stack in (self.done, self.undone):
+            for position in range(len(stack) - 1, -1, -1):
+                if stack[position] is event:
+                    del stack[position]
+                    return
+
+
+def empty_state():
+    return {"orders": {}, "carts": {}}
+
+
+def apply_action(state, event):
+    action = event["action"]
+    orders = state["orders"]
+    cart = state["carts"].setdefault(event.get("terminal", ""), [])
+    if action == "cart_add":
+        cart.insert(event["index"], event["meal"])
+    elif action == "cart_remove":
+        if event["index"] < len(cart):
+            del cart[event["index"]]
+    elif action == "finalize":
+        order = event["order"]
+        orders[order["id"]] = {key: order.get(key) for key in ("id", "created", "name", "phone")}
+        orders[order["id"]]["status"] = "Pending"
+        cart.clear()
+    elif action == "void":
+        orders.setdefault(event["order"]["id"], {"id": event["order"]["id"]})["status"] = VOID_STATUS
+        cart[:] = event["order"]["meals"]
+    elif action == "move":
+        orders.setdefault(event["id"], {"id": event["id"]})["status"] = event["to"]
+    elif action == "reset":
+        orders.clear()
+        state["carts"].clear()
+
+
+def normalize_stamp(stamp):
+    return datetime.fromisoformat(stamp).isoformat(timespec="seconds")
+
+
+def checkpoint_path(offset, at, checkpoint_dir=CHECKPOINT_DIR):
+    return os.path.join(checkpoint_dir, f"{offset:012d}-{at.replace(':', '')}.json")
+
+
+def checkpoints(checkpoint_dir=CHECKPOINT_DIR):
+    # (log offset, compact stamp, path) for every checkpoint, oldest first.
+    found = []
+    if os.path.isdir(checkpoint_dir):
+        for name in os.listdir(checkpoint_dir):
+            stem, ext = os.path.splitext(name)
+            offset, _, at = stem.partition("-")
+            if ext == ".json" and offset.isdigit():
+                found.append((int(offset), at, os.path.join(checkpoint_dir, name)))
+    return sorted(found)
+
+
+def save_checkpoint(state, offset, at, checkpoint_dir=CHECKPOINT_DIR):
+    path = checkpoint_path(offset, at, checkpoint_dir)
+    if os.path.exists(path):
+        return
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"offset": offset, "at": at, "state": state}, f, separators=(",", ":"), default=record_json)
+    os.replace(tmp_path, path)
+
+
+def replay(until=None, path=ACTION_LOG, checkpoint_dir=CHECKPOINT_DIR, every=CHECKPOINT_EVERY):
+    # Starts from the newest checkpoint taken at or before `until` and folds
+    # in the log from that offset, leaving new checkpoints behind as it goes.
+    until = normalize_stamp(until) if until else now_stamp()
+    state, offset = empty_state(), 0
+    size = file_size(path)
+    for start, at, checkpoint in reversed(checkpoints(checkpoint_dir)):
+        if start <= size and at <= until.replace(":", ""):
+            with open(checkpoint, "r") as f:
+                state = json.load(f)["state"]
+            offset = start
+            break
+    if size <= offset:
+        return state
+
+    applied = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            # A half-written last line belongs to the next replay.
+            if not line.endswith(b"\n"):
+                break
+            event = json.loads(line)
+            if event.get("at", "") > until:
+                break
+            apply_action(state, event)
+            offset += len(line)
+            applied += 1
+            if applied % every == 0:
+                save_checkpoint(state, offset, event["at"], checkpoint_dir)
+    return state
+
+
+def restore(state, store, log=None):
+    # Moves live orders back to where they stood in the replayed state. The
+    # moves go through the store like any other, so running terminals pick
+    # them up on their next poll and nothing has to stop.
+    moved, missing = [], []
+    with store.batch():
+        for oid, past in state["orders"].items():
+            order = store.get(oid)
+            if order is None:
+                missing.append(oid)
+                continue
+            status = order.get("status", "Pending")
+            if past.get("status") and status != past["status"]:
+                store.set_status(oid, past["status"], order.get("version", 0))
+                moved.append((oid, status, past["status"]))
+    if log is not None:
+        for oid, from_status, to_status in moved:
+            log.record({"action": "move", "id": oid, "from": from_status, "to": to_status})
+    return moved, missing
+
+
+def report(state):
+    orders = state["orders"].values()
+    lines = []
+    for status in STATUS_ORDER + [VOID_STATUS]:
+        in_status = [order for order in orders if order.get("status") == status]
+        lines.append(f"{status}: {len(in_status)}")
+        if status not in ("Finished", VOID_STATUS):
+            for order in in_status:
+                lines.append(f"   {order.get('name') or order['id']} ({order.get('phone') or ''})")
+    for terminal, cart in state["carts"].items():
+        if cart:
+            lines.append(f"Cart at {terminal}: {len(cart)} meals")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the board and carts as they stood at any point from the action log")
+    parser.add_argument("--at", default=None, help="point in time (YYYY-MM-DDTHH:MM[:SS]), default now")
+    parser.add_argument("--restore", action="store_true", help="move live orders back to their status at that point")
+    parser.add_argument("--every", type=int, default=CHECKPOINT_EVERY, help="events between checkpoints")
+    args = parser.parse_args()
+
+    state = replay(args.at, every=args.every)
+    print(report(state))
+    if args.restore:
+        store = open_store()
+        store.load()
+        try:
+            moved, missing = restore(state, store, ActionLog())
+        finally:
+            store.close()
+        print(f"Moved {len(moved)} orders back; {len(missing)} no longer in the live store")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from kitchen_core import HEALTHY_MEAL, TODAYS_SPECIAL, OrderDesk, next_status
+from loadgen import generate_menu, generate_orders, write_orders
+from menu_catalog import CompiledMenu
+from order_archive import day_start, today
+from order_store import OrderStore, write_snapshot
+from sales_summary import SalesSummary
+
+
+@contextlib.contextmanager
+def workdir(count):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            menu = generate_menu()
+            with open("menu.json", "w") as f:
+                json.dump(menu, f)
+            # Stamped from today's opening so the apps' roll-over keeps them live.
+            write_orders("orders.json", generate_orders(count, menu, start=datetime.fromisoformat(day_start(today()))))
+            yield menu
+        finally:
+            os.chdir(cwd)
+
+
+@contextlib.contextmanager
+def loaded_store():
+    store = OrderStore()
+    store.load()
+    try:
+        yield store
+    finally:
+        store.close()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def ensure_display():
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        return True
+    if not shutil.which("Xvfb"):
+        return False
+    xvfb = subprocess.Popen(["Xvfb", ":99", "-screen", "0", "1280x1024x24"],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    atexit.register(xvfb.terminate)
+    time.sleep(0.5)
+    os.environ["DISPLAY"] = ":99"
+    return True
+
+
+def bench_load(count, ops):
+    with workdir(count):
+        store = OrderStore()
+        seconds = timed(store.load)
+        store.close()
+    return {"seconds": seconds}
+
+
+def bench_save(count, ops):
+    with workdir(count) as menu, loaded_store() as store:
+        # Written beside the live file: replacing orders.json would make the
+        # first timed append rebuild the whole store.
+        snapshot = timed(write_snapshot, store.orders, "snapshot.json")
+        new_orders = list(generate_orders(ops, menu, seed=1))
+        start = time.perf_counter()
+        for order in new_orders:
+            store.add_order(order)
+        append = (time.perf_counter() - start) / ops
+    return {"seconds": append, "snapshot_seconds": snapshot}
+
+
+def bench_summary(count, ops):
+    with workdir(count) as menu, loaded_store() as store:
+        build = timed(SalesSummary, store.orders)
+        summary = SalesSummary(store.orders)
+        new_orders = list(generate_orders(ops, menu, seed=1))
+        start = time.perf_counter()
+        for order in new_orders:
+            summary.add_order(order)
+        incremental = (time.perf_counter() - start) / ops
+        report = timed(summary.report)
+    return {"seconds": incremental, "build_seconds": build, "report_seconds": report}
+
+
+def bench_move(count, ops):
+    with workdir(count), loaded_store() as store:
+        ids = [order["id"] for order in store.orders]
+        start = time.perf_counter()
+        for i in range(ops):
+            oid = ids[(i * 7919) % count]
+            store.set_status(oid, next_status(store.get(oid)["status"]))
+        seconds = (time.perf_counter() - start) / ops
+    return {"seconds": seconds}
+
+
+def bench_intake(count, ops):
+    with workdir(count) as menu, loaded_store() as store:
+        desk = OrderDesk(store, CompiledMenu(menu))
+        meat = next(iter(menu["todays_special"]["meats"]))
+        option = next(iter(menu["healthy_meal"]["name"]))
+        start = time.perf_counter()
+        for i in range(ops):
+            desk.add_meal(HEALTHY_MEAL, option=option)
+            desk.add_meal(TODAYS_SPECIAL, meat=meat, side=menu["todays_special"]["sides"][0], note="extra", extra_price="2")
+            desk.finalize(f"Customer {i}", f"555-{i:04d}")
+        seconds = (time.perf_counter() - start) / ops
+    return {"seconds": seconds, "orders_per_second": 1 / seconds}
+
+
+def bench_board_open(count, ops):
+    from tracking import TrackingApp
+
+    with workdir(count):
+        start = time.perf_counter()
+        app = TrackingApp()
+        app.update()
+        seconds = time.perf_counter() - start
+        app.on_close()
+    return {"seconds": seconds}
+
+
+def bench_board_move(count, ops):
+    from tracking import TrackingApp
+
+    with workdir(count):
+        app = TrackingApp()
+        app.update()
+        ids = list(app.orders)
+        start = time.perf_counter()
+        for i in range(ops):
+            oid = ids[(i * 7919) % count]
+            app.move_order(oid, next_status(app.orders[oid].get("status", "Pending")))
+            # Timed until the write has landed and the card has moved.
+            app.writer.sync()
+            app.update_idletasks()
+        seconds = (time.perf_counter() - start) / ops
+        app.on_close()
+    return {"seconds": seconds}
+
+
+BENCHMARKS = {
+    "load": bench_load,
+    "save": bench_save,
+    "summary": bench_summary,
+    "move": bench_move,
+    "intake": bench_intake,
+    "board_open": bench_board_open,
+    "board_move": bench_board_move,
+}
+TK_BENCHMARKS = {"board_open", "board_move"}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def load_results(path):
+    with open(path, "r") as f:
+        return {(r["bench"], r["orders"]): r for r in map(json.loads, f) if "seconds" in r}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kitchen system benchmarks; prints one JSON result per line")
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated order counts (up to 1000000)")
+    parser.add_argument("--ops", type=int, default=200, help="operations timed for the per-operation benchmarks")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated benchmarks to run")
+    parser.add_argument("--out", help="also append results to this JSON Lines file")
+    parser.add_argument("--baseline", help="JSON Lines results from an earlier version to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    names = args.only.split(",")
+    has_display = ensure_display() if TK_BENCHMARKS.intersection(names) else False
+    baseline = load_results(args.baseline) if args.baseline else {}
+    meta = {"commit": git_commit(), "python": platform.python_version(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+    regressions = []
+    out = open(args.out, "a") if args.out else None
+    try:
+        for count in (int(size) for size in args.sizes.split(",")):
+            for name in names:
+                result = {"bench": name, "orders": count}
+                if name in TK_BENCHMARKS and not has_display:
+                    result["skipped"] = "no display"
+                else:
+                    result.update(BENCHMARKS[name](count, args.ops))
+                    previous = baseline.get((name, count))
+                    if previous:
+                        result["baseline_ratio"] = result["seconds"] / previous["seconds"]
+                        if result["baseline_ratio"] > 1 + args.threshold:
+                            regressions.append(result)
+                result.update(meta)
+                line = json.dumps(result)
+                print(line, flush=True)
+                if out:
+                    out.write(line + "\n")
+    finally:
+        if out:
+            out.close()
+
+    for result in regressions:
+        print(f"REGRESSION: {result['bench']} at {result['orders']} orders is "
+              f"{result['baseline_ratio']:.2f}x the baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import argparse
+import csv
+import itertools
+import json
+import sys
+from datetime import datetime
+
+from kitchen_core import (HEALTHY_MEAL, MENU_SECTIONS, SPECIAL_JOINER, TODAYS_SPECIAL, OrderError, build_menu,
+                          check_status, load_menu, meal_parts, menu_rows, parse_prices, save_menu)
+from order_archive import orders_between, today
+from order_index import content_id, now_stamp
+from order_records import record_json
+from order_store import BACKEND, DB_FILE, open_store
+
+BATCH_SIZE = 1000
+ORDER_CSV_FIELDS = ("order_id", "created", "name", "phone", "status",
+                    "meal_type", "details", "meat", "side", "note", "extra_price", "price")
+MENU_CSV_FIELDS = ("section", "name", "price")
+
+
+def is_csv(path):
+    return path.lower().endswith(".csv")
+
+
+def open_output(path):
+    return sys.stdout if path == "-" else open(path, "w", newline="")
+
+
+def numbered_csv(path):
+    with open(path, "r", newline="") as f:
+        reader = csv.DictReader(f)
+        for record in reader:
+            yield reader.line_num, record
+
+
+def csv_orders(path):
+    # One CSV row per meal; consecutive rows sharing an order_id are one
+    # order, so only the order being read is ever held in memory.
+    for order_id, rows in itertools.groupby(numbered_csv(path), key=lambda item: item[1].get("order_id") or None):
+        rows = list(rows)
+        if order_id is None:
+            for number, row in rows:
+                yield number, csv_order([row])
+        else:
+            yield rows[0][0], csv_order([row for _, row in rows])
+
+
+def csv_order(rows):
+    first = rows[0]
+    order = {key: first[field] for key, field in (("id", "order_id"), ("created", "created"), ("name", "name"),
+                                                  ("phone", "phone"), ("status", "status")) if first.get(field)}
+    order["meals"] = [{key: row[key] for key in ORDER_CSV_FIELDS[5:] if row.get(key)} for row in rows]
+    return order
+
+
+def numbered_jsonl(path, errors):
+    # Lines that are not JSON are reported and skipped, like invalid orders.
+    with open(path, "r") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                errors.append(f"line {number}: not valid JSON ({e})")
+
+
+def check_price(value, label):
+    # Same rule as the menu setup screen: kitchen_core.parse_price().
+    return parse_prices([(label, value)], label)[label]
+
+
+def validate_order(order):
+    if not isinstance(order, dict):
+        raise OrderError("Invalid Order", "Each order must be a JSON object.")
+    name = str(order.get("name", "")).strip()
+    phone = str(order.get("phone", "")).strip()
+    if not name or not phone or not order.get("meals"):
+        raise OrderError("Missing Info", "An order needs a name, a phone and at least one meal.")
+    if not isinstance(order["meals"], list) or not all(isinstance(meal, dict) for meal in order["meals"]):
+        raise OrderError("Invalid Order", "Meals must be a list of JSON objects.")
+    created = order.get("created") or now_stamp()
+    try:
+        datetime.fromisoformat(created)
+    except (TypeError, ValueError):
+        raise OrderError("Invalid Date", f"Invalid created time: {created}") from None
+
+    meals = []
+    for meal in order["meals"]:
+        meal_type = meal.get("meal_type")
+        if meal_type not in (HEALTHY_MEAL, TODAYS_SPECIAL):
+            raise OrderError("Invalid Meal", f"Unknown meal type: {meal_type}")
+        price = check_price(meal.get("price", ""), "meal")
+        extra_price = check_price(meal.get("extra_price") or 0, "extra")
+        meat, side = meal_parts(meal)
+        details = meal.get("details") or (f"{meat}{SPECIAL_JOINER}{side}" if meat and side else "")
+        if not details:
+            raise OrderError("Invalid Meal", "A meal needs its details or a meat and side.")
+        clean = dict(meal, details=details, note=str(meal.get("note", "")).strip(), price=price,
+                     extra_price=extra_price)
+        if meat:
+            clean.update(meat=meat, side=side)
+        meals.append(clean)
+
+    return dict(order, id=order.get("id") or content_id(order), created=created, name=name, phone=phone,
+                status=check_status(order.get("status") or "Pending"), meals=meals)
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def valid_orders(numbered, errors):
+    for number, order in numbered:
+        try:
+            yield validate_order(order)
+        except OrderError as e:
+            errors.append(f"line {number}: {e}")
+        except (AttributeError, OverflowError, TypeError, ValueError) as e:
+            errors.append(f"line {number}: malformed order ({e})")
+
+
+def import_orders(path, batch_size=BATCH_SIZE):
+    errors = []
+    numbered = csv_orders(path) if is_csv(path) else numbered_jsonl(path, errors)
+    imported = skipped = 0
+    if BACKEND == "sqlite":
+        # Straight into the database, so memory stays flat however big the
+        # file is; INSERT OR IGNORE skips ids already there.
+        import sqlite_store
+        conn = sqlite_store.connect(DB_FILE)
+        try:
+            for batch in batches(valid_orders(numbered, errors), batch_size):
+                with sqlite_store.transaction(conn):
+                    ids = [order["id"] for order in batch]
+                    present = {row[0] for row in conn.execute(
+                        f"SELECT id FROM orders WHERE id IN ({','.join('?' * len(ids))})", ids)}
+                    fresh = [order for order in batch if order["id"] not in present]
+                    sqlite_store.insert_orders(conn, fresh)
+                imported += len(fresh)
+                skipped += len(batch) - len(fresh)
+        finally:
+            conn.close()
+        return imported, skipped, errors
+
+    store = open_store()
+    store.load()
+    try:
+        for batch in batches(valid_orders(numbered, errors), batch_size):
+            with store.batch():
+                for order in batch:
+                    if order["id"] in store.index:
+                        skipped += 1
+                    else:
+                        store.add_order(order)
+                        imported += 1
+    finally:
+        store.close()
+    return imported, skipped, errors
+
+
+def order_csv_rows(order):
+    for meal in order.get("meals", []):
+        meat, side = meal_parts(meal)
+        yield {
+            "order_id": order.get("id", ""), "created": order.get("created", ""), "name": order.get("name", ""),
+            "phone": order.get("phone", ""), "status": order.get("status", "Pending"),
+            "meal_type": meal.get("meal_type", ""), "details": meal.get("details", ""), "meat": meat or "",
+            "side": side or "", "note": meal.get("note", ""), "extra_price": meal.get("extra_price", 0),
+            "price": meal.get("price", 0),
+        }
+
+
+def export_orders(path, start_day, end_day):
+    store = open_store()
+    store.load()
+    try:
+        orders = orders_between(start_day, end_day, store)
+    except ValueError:
+        store.close()
+        raise
+    count = 0
+    f = open_output(path)
+    try:
+        writer = csv.DictWriter(f, ORDER_CSV_FIELDS) if is_csv(path) else None
+        if writer:
+            writer.writeheader()
+        for order in orders:
+            if writer:
+                writer.writerows(order_csv_rows(order))
+            else:
+                f.write(json.dumps(order, separators=(",", ":"), default=record_json) + "\n")
+            count += 1
+    finally:
+        if f is not sys.stdout:
+            f.close()
+        store.close()
+    return count
+
+
+def import_menu(path):
+    rows = {section: [] for section in MENU_SECTIONS}
+    errors = []
+    for number, record in numbered_csv(path) if is_csv(path) else numbered_jsonl(path, errors):
+        if errors:
+            break
+        if not isinstance(record, dict):
+            raise OrderError("Invalid Menu", f"line {number}: each item must be a JSON object.")
+        section = str(record.get("section", "")).strip().lower()
+        name = str(record.get("name", "")).strip()
+        if section not in rows or not name:
+            raise OrderError("Invalid Menu", f"line {number}: needs a section ({', '.join(MENU_SECTIONS)}) and a name.")
+        if section == "side":
+            rows[section].append(name)
+            continue
+        try:
+            parse_prices([(name, record.get("price", ""))], section)
+        except OrderError as e:
+            raise OrderError(e.title, f"line {number}: {e}") from None
+        rows[section].append((name, record.get("price")))
+    if errors:
+        raise OrderError("Invalid Menu", errors[0])
+    menu = build_menu(rows["healthy"], rows["meat"], rows["side"])
+    save_menu(menu)
+    return sum(len(items) for items in rows.values())
+
+
+def export_menu(path):
+    rows = list(menu_rows(load_menu() or {}))
+    f = open_output(path)
+    try:
+        if is_csv(path):
+            writer = csv.DictWriter(f, MENU_CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and export orders and menus as CSV or JSON Lines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    orders_in = commands.add_parser("import-orders", help="validate and add orders from a .csv or .jsonl file")
+    orders_in.add_argument("path")
+    orders_in.add_argument("--batch", type=int, default=BATCH_SIZE, help="orders written per batch")
+
+    orders_out = commands.add_parser("export-orders", help="write a range of business days to .csv or .jsonl")
+    orders_out.add_argument("path", help="output file, or - for stdout (JSON Lines)")
+    orders_out.add_argument("--from", dest="start", default=None, help="first business day (YYYY-MM-DD), default today")
+    orders_out.add_argument("--to", dest="end", default=None, help="last business day, default the first")
+
+    menu_in = commands.add_parser("import-menu", help="replace the menu from section,name,price rows")
+    menu_in.add_argument("path")
+
+    menu_out = commands.add_parser("export-menu", help="write the menu as section,name,price rows")
+    menu_out.add_argument("path", help="output file, or - for stdout (JSON Lines)")
+    args = parser.parse_args()
+
+    if args.command == "import-orders":
+        imported, skipped, errors = import_orders(args.path, args.batch)
+        for error in errors:
+            print(error, file=sys.stderr)
+        print(f"Imported {imported} orders, skipped {skipped} already present, rejected {len(errors)}", file=sys.stderr)
+        return 1 if errors else 0
+    if args.command == "export-orders":
+        start = args.start or today()
+        try:
+            count = export_orders(args.path, start, args.end or start)
+        except ValueError as e:
+            print(f"Invalid date range: {e}", file=sys.stderr)
+            return 1
+        print(f"Exported {count} orders", file=sys.stderr)
+        return 0
+    if args.command == "import-menu":
+        try:
+            count = import_menu(args.path)
+        except OrderError as e:
+            print(e, file=sys.stderr)
+            return 1
+        print(f"Imported {count} menu items", file=sys.stderr)
+        return 0
+    print(f"Exported {export_menu(args.path)} menu items", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import argparse
+import bisect
+import json
+import os
+
+from order_archive import orders_between, partition_days, today
+from order_index import normalize_phone
+from order_store import file_size
+
+CUSTOMERS_FILE = "customers.jsonl"
+MAX_COMPLETIONS = 10
+CUSTOMER_MEAL_KEYS = ("meal_type", "details", "note", "extra_price", "meat", "side")
+
+
+def customer_record(order):
+    return {
+        "phone": normalize_phone(order.get("phone", "")),
+        "display_phone": order.get("phone", ""),
+        "name": order.get("name", ""),
+        "at": order.get("created", ""),
+        "meals": [{key: meal[key] for key in CUSTOMER_MEAL_KEYS if key in meal} for meal in order.get("meals", [])],
+    }
+
+
+class CustomerDirectory:
+    # One record per customer keyed by normalized phone, holding the name and
+    # the last order. The file is append-only JSON Lines where the newest
+    # record for a phone wins, and other counters' appends are picked up by
+    # reading from the last offset, like the order journal.
+    def __init__(self, path=CUSTOMERS_FILE, defer=None):
+        self.path = path
+        # Callers on the Tk thread pass WriteBehind.submit so the append
+        # happens off the event loop.
+        self.defer = defer
+        self.customers = {}
+        self.phones = []
+        self.offset = 0
+
+    def load(self):
+        self.customers = {}
+        self.phones = []
+        self.offset = 0
+        if not os.path.exists(self.path):
+            return False
+        self.refresh()
+        return True
+
+    def refresh(self):
+        if file_size(self.path) <= self.offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            for line in f:
+                # A line still being appended by another counter is left for
+                # the next refresh.
+                if not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                if line.strip():
+                    self.apply(json.loads(line))
+
+    def apply(self, record):
+        phone = record["phone"]
+        current = self.customers.get(phone)
+        if current is None:
+            bisect.insort(self.phones, phone)
+        elif current["at"] > record["at"]:
+            return
+        self.customers[phone] = record
+
+    def remember(self, order):
+        record = customer_record(order)
+        if not record["phone"]:
+            return None
+        self.apply(record)
+        if self.defer:
+            self.defer(self.append, record)
+        else:
+            self.append(record)
+        return record
+
+    def append(self, record):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def rebuild(self, orders):
+        self.customers = {}
+        self.phones = []
+        for order in orders:
+            record = customer_record(order)
+            if record["phone"]:
+                self.apply(record)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for phone in self.phones:
+                f.write(json.dumps(self.customers[phone], separators=(",", ":")) + "\n")
+        os.replace(tmp_path, self.path)
+        self.offset = file_size(self.path)
+        return len(self.customers)
+
+    def lookup(self, phone):
+        return self.customers.get(normalize_phone(phone))
+
+    def complete(self, prefix, limit=MAX_COMPLETIONS):
+        # Phones are kept sorted, so every phone starting with the prefix sits
+        # in one run found by a binary search.
+        prefix = normalize_phone(prefix)
+        if not prefix:
+            return []
+        matches = []
+        position = bisect.bisect_left(self.phones, prefix)
+        while position < len(self.phones) and len(matches) < limit and self.phones[position].startswith(prefix):
+            matches.append(self.customers[self.phones[position]])
+            position += 1
+        return matches
+
+
+def all_orders(store):
+    days = partition_days()
+    return orders_between(days[0] if days else today(), today(), store)
+
+
+def main():
+    from order_store import open_store
+
+    parser = argparse.ArgumentParser(description="Rebuild the customer directory from live and archived orders")
+    parser.add_argument("--out", default=CUSTOMERS_FILE, help="customer file to write")
+    args = parser.parse_args()
+
+    store = open_store()
+    store.load()
+    count = CustomerDirectory(args.out).rebuild(all_orders(store))
+    store.close()
+    print(f"Wrote {count} customers to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+import json
+import math
+import os
+
+from menu_catalog import CompiledMenu, MenuHistory, healthy_sku, meat_sku
+from order_index import new_order_id, now_stamp
+from order_records import Meal, format_cents, to_cents
+from order_store import BACKEND, DB_FILE, SERVER_ADDRESS, stat_key
+
+MENU_FILE = "menu.json"
+STATUS_ORDER = ["Pending", "Prepping", "Pick-Up", "Finished"]
+HEALTHY_MEAL = "Healthy Meal"
+TODAYS_SPECIAL = "Today's Special"
+# Status of a finalized order that was taken back with undo; it never shows
+# on the board or in sales.
+VOID_STATUS = "Voided"
+SPECIAL_JOINER = " with "
+# Flat (section, name, price) rows are how menus are edited, imported and
+# exported; sides carry no price.
+MENU_SECTIONS = ("healthy", "meat", "side")
+
+
+class OrderError(ValueError):
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+def save_menu(menu):
+    MenuHistory().remember(CompiledMenu(menu))
+    if BACKEND == "remote":
+        from order_client import request_once
+        request_once("save_menu", SERVER_ADDRESS, menu=menu)
+        return
+    if BACKEND == "sqlite":
+        import sqlite_store
+        sqlite_store.save_menu(menu, DB_FILE)
+        return
+    # Written to a temp file and renamed so a running counter never hot-reloads
+    # a half-written menu.
+    tmp_path = MENU_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(menu, f, indent=2)
+    os.replace(tmp_path, MENU_FILE)
+
+
+def load_menu():
+    if BACKEND == "remote":
+        from order_client import request_once
+        return request_once("menu", SERVER_ADDRESS)["menu"]
+    if BACKEND == "sqlite":
+        import sqlite_store
+        return sqlite_store.load_menu(DB_FILE)
+    if os.path.exists(MENU_FILE):
+        with open(MENU_FILE, "r") as f:
+            return json.load(f)
+    return None
+
+
+def menu_key(store=None):
+    # Cheap change check for hot reload; the menu is only re-read and
+    # re-hashed when this moves. A remote store already hears the version
+    # from the server.
+    if BACKEND == "remote":
+        if store is not None:
+            return store.menu_version
+        from order_client import request_once
+        return request_once("menu_version", SERVER_ADDRESS)
+    if BACKEND == "sqlite":
+        # The database file moves with every order; the version row only
+        # with the menu.
+        import sqlite_store
+        return sqlite_store.menu_version(DB_FILE)
+    return stat_key(MENU_FILE)
+
+
+def parse_price(price_text):
+    # Anything float() accepts, short of inf, nan and negative amounts.
+    price = float(price_text)
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"Invalid price: {price_text}")
+    return price
+
+
+def parse_prices(rows, section):
+    prices = {}
+    try:
+        for name, price_text in rows:
+            name = name.strip()
+            price = parse_price(price_text)
+            if name:
+                prices[name] = price
+    except (TypeError, ValueError):
+        raise OrderError("Error", f"Invalid price in {section} options.") from None
+    return prices
+
+
+def build_menu(healthy_rows, meat_rows, sides):
+    return {
+        "healthy_meal": {"name": parse_prices(healthy_rows, "healthy meal")},
+        "todays_special": {
+            "meats": parse_prices(meat_rows, "meat"),
+            "sides": [side.strip() for side in sides if side.strip()]
+        }
+    }
+
+
+def menu_rows(menu):
+    for name, price in menu.get("healthy_meal", {}).get("name", {}).items():
+        yield {"section": "healthy", "name": name, "price": price}
+    for name, price in menu.get("todays_special", {}).get("meats", {}).items():
+        yield {"section": "meat", "name": name, "price": price}
+    for name in menu.get("todays_special", {}).get("sides", []):
+        yield {"section": "side", "name": name, "price": ""}
+
+
+def meal_parts(meal):
+    # Meals saved before meat/side were recorded separately only carry the
+    # "<meat> with <side>" details string.
+    meal = Meal.from_dict(meal)
+    if meal.meal_type != TODAYS_SPECIAL:
+        return None, None
+    if meal.meat is not None:
+        return meal.meat, meal.side
+    meat, _, side = (meal.details or "").partition(SPECIAL_JOINER)
+    return meat, side or None
+
+
+def build_meal(menu, meal_type, option="", meat="", side="", note="", extra_price="0"):
+    if meal_type == HEALTHY_MEAL:
+        if not option:
+            raise OrderError("Missing Info", "Please select a healthy meal option.")
+        sku = healthy_sku(option)
+        details = option
+        parts = {}
+    else:
+        if not meat or not side:
+            raise OrderError("Missing Info", "Please select meat and sides.")
+        sku = meat_sku(meat)
+        details = f"{meat}{SPECIAL_JOINER}{side}"
+        parts = {"meat": meat, "side": side}
+
+    try:
+        extra_cents = to_cents(parse_price(str(extra_price).strip()))
+    except ValueError:
+        raise OrderError("Invalid Price", "Please enter a valid number for extra cost.") from None
+
+    try:
+        price = menu.price(sku)
+    except KeyError:
+        raise OrderError("Menu Changed", f"{details} is no longer on the menu.") from None
+
+    return Meal(meal_type, details, to_cents(price) + extra_cents, note.strip(), extra_cents, sku, **parts)
+
+
+def create_order(name, phone, meals, menu_version=None):
+    name = name.strip()
+    phone = phone.strip()
+    if not name or not phone or not meals:
+        raise OrderError("Missing Info", "Please fill in name, phone, and at least one meal.")
+    order = {
+        "id": new_order_id(),
+        "created": now_stamp(),
+        "name": name,
+        "phone": phone,
+        "meals": list(meals),
+        "status": "Pending"
+    }
+    if menu_version:
+        order["menu_version"] = menu_version
+    return order
+
+
+def check_status(status):
+    if status not in STATUS_ORDER and status != VOID_STATUS:
+        raise OrderError("Invalid Status", f"Unknown order status: {status}")
+    return status
+
+
+def next_status(status):
+    return STATUS_ORDER[(STATUS_ORDER.index(status) + 1) % len(STATUS_ORDER)]
+
+
+class Cart:
+    def __init__(self):
+        self.meals = []
+
+    def __len__(self):
+        return len(self.meals)
+
+    def add(self, meal):
+        self.meals.append(meal)
+        return meal
+
+    def insert(self, index, meal):
+        self.meals.insert(index, meal)
+        return meal
+
+    def remove(self, index):
+        return self.meals.pop(index)
+
+    def total_cents(self):
+        return sum(meal.price_cents for meal in self.meals)
+
+    def total_text(self):
+        return format_cents(self.total_cents())
+
+    def clear(self):
+        self.meals.clear()
+
+
+class OrderDesk:
+    def __init__(self, store, menu, summary=None, customers=None, estimator=None):
+        self.store = store
+        self.menu = menu
+        self.summary = summary
+        self.customers = customers
+        self.estimator = estimator
+        self.cart = Cart()
+
+    def add_meal(self, meal_type, option="", meat="", side="", note="", extra_price="0"):
+        return self.cart.add(build_meal(self.menu, meal_type, option, meat, side, note, extra_price))
+
+    def remove_meal(self, index):
+        return self.cart.remove(index)
+
+    def finalize(self, name, phone, pending_ahead=0):
+        order = create_order(name, phone, self.cart.meals, self.menu.version)
+        if self.estimator is not None:
+            order["ready_by"] = self.estimator.ready_at(order, pending_ahead).isoformat(timespec="seconds")
+        self.store.add_order(order)
+        if self.summary is not None:
+            self.summary.add_order(order)
+        if self.customers is not None:
+            self.customers.remember(order)
+        self.cart.clear()
+        return order
+
+    def repeat_last(self, phone):
+        # Re-prices the customer's last order against today's menu; meals no
+        # longer on it are reported back instead of added.
+        record = self.customers.lookup(phone) if self.customers is not None else None
+        if record is None:
+            raise OrderError("No History", "No earlier order for this phone number.")
+        added, missing = [], []
+        for meal in record["meals"]:
+            meat, side = meal_parts(meal)
+            try:
+                added.append(self.add_meal(meal["meal_type"], option=meal.get("details", ""), meat=meat or "",
+                                           side=side or "", note=meal.get("note", ""),
+                                           extra_price=meal.get("extra_price", 0)))
+            except OrderError:
+                missing.append(meal.get("details", ""))
+        return record, added, missing
+
+    def move(self, oid, status, expected_version=None):
+        return self.store.set_status(oid, check_status(status), expected_version)
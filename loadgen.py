@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from kitchen_core import HEALTHY_MEAL, SPECIAL_JOINER, STATUS_ORDER, TODAYS_SPECIAL
+
+FIRST_NAMES = ["Tyler", "Alex", "Maria", "Jon", "Priya", "Kofi", "Ana", "Wei", "Sam", "Leila", "Omar", "Grace"]
+HEALTHY_NAMES = ["Salad", "Grilled Fish Bowl", "Veggie Wrap", "Quinoa Plate", "Fruit Bowl", "Chicken Salad"]
+MEAT_NAMES = ["Stew Chicken", "Stew Beef", "Curry Goat", "Jerk Pork", "Fried Fish", "Oxtail", "Curry Chicken", "Baked Chicken"]
+SIDE_NAMES = ["Rice and beans", "Salad", "Macaroni pie", "Plantains", "Callaloo", "Coleslaw", "Dhal and rice", "Bake"]
+NOTES = ["extra meat", "no pepper", "leg", "breast", "extra sauce", "well done"]
+
+# Rough share of a day's orders still in each status at close.
+STATUS_WEIGHTS = [5, 5, 10, 80]
+
+
+def generate_menu(rng=None, healthy=4, meats=6, sides=5):
+    rng = rng or random.Random(0)
+    return {
+        "healthy_meal": {"name": {name: float(rng.randrange(12, 18)) for name in HEALTHY_NAMES[:healthy]}},
+        "todays_special": {
+            "meats": {name: float(rng.randrange(11, 20)) for name in MEAT_NAMES[:meats]},
+            "sides": SIDE_NAMES[:sides]
+        }
+    }
+
+
+def generate_meal(rng, menu):
+    note = rng.choice(NOTES) if rng.random() < 0.2 else ""
+    extra_price = float(rng.choice([1, 2, 3])) if note and rng.random() < 0.5 else 0.0
+    if rng.random() < 0.3:
+        option, price = rng.choice(list(menu["healthy_meal"]["name"].items()))
+        return {"meal_type": HEALTHY_MEAL, "details": option, "note": note,
+                "extra_price": extra_price, "price": price + extra_price}
+    meat, price = rng.choice(list(menu["todays_special"]["meats"].items()))
+    side = rng.choice(menu["todays_special"]["sides"])
+    return {"meal_type": TODAYS_SPECIAL, "details": f"{meat}{SPECIAL_JOINER}{side}", "note": note,
+            "extra_price": extra_price, "price": price + extra_price, "meat": meat, "side": side}
+
+
+def generate_orders(count, menu=None, seed=0, start=None):
+    # Yields orders lazily so a million of them can be streamed to disk.
+    rng = random.Random(seed)
+    menu = menu or generate_menu(rng)
+    start = start or datetime(2026, 1, 1, 10, 0)
+    # Spread the orders evenly over roughly a 12-hour service per day.
+    step = timedelta(seconds=max(1, 43200 // max(count, 1)))
+    for i in range(count):
+        yield {
+            "id": f"{seed:04x}{i:08x}",
+            "created": (start + step * i).isoformat(timespec="seconds"),
+            "name": f"{rng.choice(FIRST_NAMES)} {i}",
+            "phone": f"868-{rng.randrange(200, 999)}-{rng.randrange(0, 9999):04d}",
+            "meals": [generate_meal(rng, menu) for _ in range(rng.choice([1, 1, 1, 2, 2, 3, 4]))],
+            "status": rng.choices(STATUS_ORDER, STATUS_WEIGHTS)[0],
+            "version": 0
+        }
+
+
+def write_orders(path, orders):
+    with open(path, "w") as f:
+        f.write("[")
+        for i, order in enumerate(orders):
+            if i:
+                f.write(",\n")
+            f.write(json.dumps(order))
+        f.write("]\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic menu.json and orders.json")
+    parser.add_argument("--orders", type=int, default=1000, help="number of orders to generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=".", help="directory to write menu.json and orders.json into")
+    args = parser.parse_args()
+
+    menu = generate_menu(random.Random(args.seed))
+    with open(os.path.join(args.out, "menu.json"), "w") as f:
+        json.dump(menu, f, indent=2)
+    write_orders(os.path.join(args.out, "orders.json"), generate_orders(args.orders, menu, args.seed))
+    print(f"Wrote {args.orders} orders to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
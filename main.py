@@ -1,40 +1,58 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
-
-MENU_FILE = "menu.json"
-ORDERS_FILE = "orders.json"
-
-def save_menu(menu):
-    with open(MENU_FILE, "w") as f:
-        json.dump(menu, f)
-
-def load_menu():
-    if os.path.exists(MENU_FILE):
-        with open(MENU_FILE, "r") as f:
-            return json.load(f)
-    return None
-
-def save_orders(orders):
-    with open(ORDERS_FILE, "w") as f:
-        json.dump(orders, f, indent=2)
-
-def load_orders():
-    if os.path.exists(ORDERS_FILE):
-        with open(ORDERS_FILE, "r") as f:
-            return json.load(f)
-    return []
+from action_log import ActionLog, UndoStack
+from customer_directory import CustomerDirectory, all_orders
+from kitchen_core import MENU_FILE, VOID_STATUS, OrderDesk, OrderError, load_menu, menu_key
+from menu_catalog import CompiledMenu, MenuHistory
+from menu_search import MenuSearch
+from order_archive import orders_between, stash_file, today
+from order_index import now_stamp
+from order_metrics import seconds_between
+from order_store import StaleOrderError, open_store
+from pickup_estimate import PickupEstimator
+from sales_summary import SalesSummary, order_lines
+from write_behind import WriteBehind
+
+SUMMARY_PAGE_SIZE = 50
+MENU_POLL_MS = 2000
+# How often kitchen moves are folded into the pickup estimate.
+STORE_POLL_MS = 2000
 
 class TakeoutApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Takeout Order Tracker")
 
-        self.menu = load_menu()
-        self.orders = load_orders()
-        self.order_list = []
+        self.store = open_store()
+        self.menu_history = MenuHistory()
+        self.menu_key = menu_key(self.store)
+        self.menu = CompiledMenu(load_menu())
+        self.menu_history.remember(self.menu)
+        self.menu_search = MenuSearch(self.menu)
+        self.quick_matches = []
+        self.store.load()
+        self.store.roll_over()
+        self.summary = SalesSummary(self.store.orders)
+        self.estimator = PickupEstimator(self.store.orders)
+        self.pending_count = len(self.store.with_status("Pending"))
+        self.writer = WriteBehind(self.store, self, on_error=self.save_failed)
+        self.customers = CustomerDirectory(defer=self.writer.submit)
+        if not self.customers.load():
+            # First run with a directory: seed it once from every order kept.
+            self.customers.rebuild(all_orders(self.store))
+        self.phone_matches = []
+        self.desk = OrderDesk(self.writer, self.menu, self.summary, self.customers, self.estimator)
+        self.actions = ActionLog()
+        self.history = UndoStack()
+        # Set while a void or restore is on its way to the store.
+        self.undo_pending = False
         self.create_widgets()
+        self.bind("<Control-z>", self.undo)
+        self.bind("<Control-y>", self.redo)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(MENU_POLL_MS, self.check_menu)
+        self.after(STORE_POLL_MS, self.poll_store)
 
     def create_widgets(self):
         for widget in self.winfo_children():
@@ -47,8 +65,10 @@ class TakeoutApp(tk.Tk):
         self.name_entry.grid(row=0, column=1, sticky="w")
 
         ttk.Label(self, text="Phone Number:").grid(row=1, column=0, sticky="e")
-        self.phone_entry = ttk.Entry(self, width=entry_width)
+        self.phone_entry = ttk.Combobox(self, width=entry_width - 2, postcommand=self.complete_phone)
         self.phone_entry.grid(row=1, column=1, sticky="w")
+        self.phone_entry.bind("<KeyRelease>", self.complete_phone)
+        self.phone_entry.bind("<<ComboboxSelected>>", self.pick_customer)
 
         ttk.Label(self, text="Meal Type:").grid(row=2, column=0, sticky="e")
         self.meal_type = tk.StringVar()
@@ -60,7 +80,7 @@ class TakeoutApp(tk.Tk):
         self.healthy_frame.grid(row=3, column=0, columnspan=2, pady=10, sticky="w")
         ttk.Label(self.healthy_frame, text="Select Healthy Option:").grid(row=0, column=0, sticky="e")
         self.healthy_choice = tk.StringVar()
-        self.healthy_combo = ttk.Combobox(self.healthy_frame, textvariable=self.healthy_choice, values=list(self.menu["healthy_meal"]["name"].keys()), state="readonly", width=entry_width - 2)
+        self.healthy_combo = ttk.Combobox(self.healthy_frame, textvariable=self.healthy_choice, values=self.menu.healthy_names, state="readonly", width=entry_width - 2)
         self.healthy_combo.grid(row=0, column=1, sticky="w")
         self.healthy_frame.grid_remove()
 
@@ -68,12 +88,12 @@ class TakeoutApp(tk.Tk):
         self.special_frame.grid(row=4, column=0, columnspan=2, pady=10, sticky="w")
         ttk.Label(self.special_frame, text="Select Meat:").grid(row=0, column=0, sticky="e")
         self.meat_choice = tk.StringVar()
-        self.meat_combo = ttk.Combobox(self.special_frame, textvariable=self.meat_choice, values=list(self.menu["todays_special"]["meats"].keys()), state="readonly", width=entry_width - 2)
+        self.meat_combo = ttk.Combobox(self.special_frame, textvariable=self.meat_choice, values=self.menu.meat_names, state="readonly", width=entry_width - 2)
         self.meat_combo.grid(row=0, column=1, sticky="w")
 
         ttk.Label(self.special_frame, text="Select Side Combo:").grid(row=1, column=0, sticky="e")
         self.side_choice = tk.StringVar()
-        self.side_combo = ttk.Combobox(self.special_frame, textvariable=self.side_choice, values=self.menu["todays_special"]["sides"], state="readonly", width=entry_width - 2)
+        self.side_combo = ttk.Combobox(self.special_frame, textvariable=self.side_choice, values=self.menu.side_names, state="readonly", width=entry_width - 2)
         self.side_combo.grid(row=1, column=1, sticky="w")
         self.special_frame.grid_remove()
 
@@ -89,6 +109,18 @@ class TakeoutApp(tk.Tk):
         self.add_item_button = ttk.Button(self, text="Add Meal to Cart", command=self.add_meal)
         self.add_item_button.grid(row=7, column=0, columnspan=2, pady=5)
 
+        quick_frame = ttk.LabelFrame(self, text="Quick Add (type, arrows, Enter)")
+        quick_frame.grid(row=0, column=2, rowspan=8, padx=10, sticky="nw")
+        self.quick_entry = ttk.Entry(quick_frame, width=entry_width + 10)
+        self.quick_entry.pack(padx=5, pady=5, fill="x")
+        self.quick_listbox = tk.Listbox(quick_frame, width=entry_width + 10, height=8, exportselection=False)
+        self.quick_listbox.pack(padx=5, pady=(0, 5))
+        self.quick_entry.bind("<KeyRelease>", self.update_quick_matches)
+        self.quick_entry.bind("<Down>", lambda e: self.move_quick_selection(1))
+        self.quick_entry.bind("<Up>", lambda e: self.move_quick_selection(-1))
+        self.quick_entry.bind("<Return>", self.quick_add)
+        self.quick_listbox.bind("<Double-Button-1>", self.quick_add)
+
         ttk.Label(self, text="Cart:").grid(row=8, column=0, sticky="ne")
         cart_frame = ttk.Frame(self)
         cart_frame.grid(row=8, column=1, sticky="w")
@@ -107,6 +139,10 @@ class TakeoutApp(tk.Tk):
         self.remove_button.pack(side="left", padx=5)
         self.order_button = ttk.Button(button_frame, text="Finalize Order", command=self.finalize_order)
         self.order_button.pack(side="left")
+        self.repeat_button = ttk.Button(button_frame, text="Repeat Last Order", command=self.repeat_last_order)
+        self.repeat_button.pack(side="left", padx=5)
+        ttk.Button(button_frame, text="Undo", command=self.undo).pack(side="left")
+        ttk.Button(button_frame, text="Redo", command=self.redo).pack(side="left", padx=5)
 
         self.summary_button = ttk.Button(self, text="View Summary", command=self.view_summary)
         self.summary_button.grid(row=11, column=0, columnspan=2)
@@ -114,6 +150,34 @@ class TakeoutApp(tk.Tk):
         self.reset_button = ttk.Button(self, text="Reset Menu & Orders", command=self.reset_all)
         self.reset_button.grid(row=12, column=0, columnspan=2, pady=10)
 
+    def check_menu(self):
+        try:
+            key = menu_key(self.store)
+            if key != self.menu_key:
+                try:
+                    menu = CompiledMenu(load_menu())
+                except ValueError:
+                    menu = None
+                # An unreadable menu is retried on the next tick.
+                self.menu_key = key if menu is not None else None
+                if menu is not None and menu.version != self.menu.version:
+                    self.apply_menu(menu)
+        except (OSError, RuntimeError):
+            # Order server unreachable; tried again on the next tick.
+            self.menu_key = None
+        finally:
+            self.after(MENU_POLL_MS, self.check_menu)
+
+    def apply_menu(self, menu):
+        self.menu = menu
+        self.desk.menu = menu
+        self.menu_search = MenuSearch(menu)
+        self.update_quick_matches()
+        self.menu_history.remember(menu)
+        self.healthy_combo.config(values=menu.healthy_names)
+        self.meat_combo.config(values=menu.meat_names)
+        self.side_combo.config(values=menu.side_names)
+
     def update_meal_options(self, event):
         meal = self.meal_type.get()
         if meal == "Healthy Meal":
@@ -124,92 +188,248 @@ class TakeoutApp(tk.Tk):
             self.special_frame.grid()
 
     def update_total(self):
-        total = sum(meal["price"] for meal in self.order_list)
-        self.total_label.config(text=f"Total: ${total:.2f}")
+        self.total_label.config(text=f"Total: {self.desk.cart.total_text()}")
 
     def add_meal(self):
-        meal_type = self.meal_type.get()
-        if meal_type == "Healthy Meal":
-            healthy_name = self.healthy_choice.get()
-            if not healthy_name:
-                messagebox.showerror("Missing Info", "Please select a healthy meal option.")
-                return
-            price = self.menu["healthy_meal"]["name"][healthy_name]
-            details = healthy_name
-        else:
-            meat = self.meat_choice.get()
-            side = self.side_choice.get()
-            if not meat or not side:
-                messagebox.showerror("Missing Info", "Please select meat and sides.")
-                return
-            price = self.menu["todays_special"]["meats"][meat]
-            details = f"{meat} with {side}"
-
-        note = self.notes_entry.get().strip()
         try:
-            extra_price = float(self.extra_price_entry.get().strip())
-        except ValueError:
-            messagebox.showerror("Invalid Price", "Please enter a valid number for extra cost.")
+            meal = self.desk.add_meal(
+                self.meal_type.get(),
+                option=self.healthy_choice.get(),
+                meat=self.meat_choice.get(),
+                side=self.side_choice.get(),
+                note=self.notes_entry.get(),
+                extra_price=self.extra_price_entry.get()
+            )
+        except OrderError as e:
+            messagebox.showerror(e.title, str(e))
             return
 
-        total_price = price + extra_price
-
-        meal_summary = f"{details} - ${total_price:.2f}"
-        if note:
-            meal_summary += f" (Note: {note})"
-
-        self.cart_listbox.insert(tk.END, meal_summary)
-
-        self.order_list.append({
-            "meal_type": meal_type,
-            "details": details,
-            "note": note,
-            "extra_price": extra_price,
-            "price": total_price
-        })
-
-        self.update_total()
-
+        self.meal_added(meal)
         self.meal_type_combo.set('')
         self.healthy_combo.set('')
         self.meat_combo.set('')
         self.side_combo.set('')
+        self.healthy_frame.grid_remove()
+        self.special_frame.grid_remove()
+
+    def complete_phone(self, event=None):
+        if event is not None and event.keysym in ("Up", "Down", "Return", "Escape"):
+            return
+        self.customers.refresh()
+        self.phone_matches = self.customers.complete(self.phone_entry.get())
+        self.phone_entry.config(values=[f"{record['display_phone']}  ({record['name']})" for record in self.phone_matches])
+
+    def pick_customer(self, event=None):
+        record = self.phone_matches[self.phone_entry.current()]
+        self.phone_entry.set(record["display_phone"])
+        if not self.name_entry.get().strip():
+            self.name_entry.insert(0, record["name"])
+
+    def repeat_last_order(self):
+        self.customers.refresh()
+        try:
+            record, added, missing = self.desk.repeat_last(self.phone_entry.get())
+        except OrderError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        for meal in added:
+            self.meal_added(meal)
+        if not self.name_entry.get().strip():
+            self.name_entry.insert(0, record["name"])
+        if missing:
+            messagebox.showwarning("Menu Changed", "Not on today's menu: " + ", ".join(missing))
+
+    def meal_added(self, meal):
+        self.record({"action": "cart_add", "index": len(self.desk.cart) - 1, "meal": meal})
+        self.cart_listbox.insert(tk.END, meal.summary())
+        self.update_total()
         self.notes_entry.delete(0, tk.END)
         self.extra_price_entry.delete(0, tk.END)
         self.extra_price_entry.insert(0, "0")
-        self.healthy_frame.grid_remove()
-        self.special_frame.grid_remove()
+
+    def update_quick_matches(self, event=None):
+        if event is not None and event.keysym in ("Up", "Down", "Return"):
+            return
+        self.quick_matches = self.menu_search.search(self.quick_entry.get())
+        self.quick_listbox.delete(0, tk.END)
+        for label, _, price in self.quick_matches:
+            self.quick_listbox.insert(tk.END, f"{label} - ${price:.2f}")
+        if self.quick_matches:
+            self.quick_listbox.selection_set(0)
+
+    def move_quick_selection(self, delta):
+        if not self.quick_matches:
+            return "break"
+        selected = self.quick_listbox.curselection()
+        index = min(max((selected[0] if selected else -1) + delta, 0), len(self.quick_matches) - 1)
+        self.quick_listbox.selection_clear(0, tk.END)
+        self.quick_listbox.selection_set(index)
+        self.quick_listbox.see(index)
+        return "break"
+
+    def quick_add(self, event=None):
+        selected = self.quick_listbox.curselection()
+        if not selected:
+            return "break"
+        _, choice, _ = self.quick_matches[selected[0]]
+        # Notes and extra cost typed in the form apply to quick adds too.
+        try:
+            meal = self.desk.add_meal(note=self.notes_entry.get(), extra_price=self.extra_price_entry.get(), **choice)
+        except OrderError as e:
+            messagebox.showerror(e.title, str(e))
+            return "break"
+        self.meal_added(meal)
+        self.quick_entry.delete(0, tk.END)
+        self.update_quick_matches()
+        self.quick_entry.focus_set()
+        return "break"
 
     def remove_selected_meal(self):
         selected = self.cart_listbox.curselection()
         if selected:
             index = selected[0]
             self.cart_listbox.delete(index)
-            del self.order_list[index]
+            meal = self.desk.remove_meal(index)
+            self.record({"action": "cart_remove", "index": index, "meal": meal})
             self.update_total()
 
+    def poll_store(self):
+        # A failed read is reported by Tk; live updates carry on regardless.
+        try:
+            self.fold_changes()
+        finally:
+            self.after(STORE_POLL_MS, self.poll_store)
+
+    def fold_changes(self):
+        # Orders from other terminals join the running totals, and every
+        # kitchen move since the last poll feeds the pickup estimate.
+        for oid in self.writer.poll():
+            order = self.store.get(oid)
+            if order is None:
+                # Archived or reset away by another process.
+                continue
+            if order.get("status") == VOID_STATUS:
+                # Voided at another counter, so it leaves the totals here too;
+                # add_order brings it back if that void is undone.
+                self.summary.remove_order(order)
+            else:
+                self.summary.add_order(order)
+            self.estimator.observe(order)
+
+    def pending_ahead(self):
+        # Never waits out a flush on the Tk thread; the count from the last
+        # time the store was free is close enough for an estimate.
+        if self.writer.mutex.acquire(blocking=False):
+            try:
+                self.pending_count = len(self.store.with_status("Pending"))
+            finally:
+                self.writer.mutex.release()
+        return self.pending_count
+
     def finalize_order(self):
-        name = self.name_entry.get().strip()
-        phone = self.phone_entry.get().strip()
+        self.fold_changes()
+        try:
+            order = self.desk.finalize(self.name_entry.get(), self.phone_entry.get(), self.pending_ahead())
+        except OrderError as e:
+            messagebox.showerror(e.title, str(e))
+            return
+        self.pending_count += 1
+
+        # The cart those edits applied to is gone; undoing the finalize
+        # brings the whole cart back instead.
+        self.history.drop(("cart_add", "cart_remove"))
+        self.record({"action": "finalize", "order": order})
+        ready_by = order["ready_by"]
+        minutes = max(round(seconds_between(now_stamp(), ready_by) / 60), 1)
+        messagebox.showinfo("Order Finalized", f"Order for {order['name']} added with {len(order['meals'])} meals.\n"
+                                               f"Ready in about {minutes} min ({ready_by[11:16]}).")
+        self.cart_listbox.delete(0, tk.END)
+        self.update_total()
+        self.clear_form()
+
+    def record(self, event):
+        self.history.push(event)
+        self.log_action(event)
+
+    def log_action(self, event):
+        self.writer.submit(self.actions.record, event)
+
+    def undo(self, event=None):
+        if self.undo_pending:
+            self.bell()
+        else:
+            self.apply_action(self.history.undo())
+        return "break"
+
+    def redo(self, event=None):
+        if self.undo_pending:
+            self.bell()
+        else:
+            self.apply_action(self.history.redo())
+        return "break"
 
-        if not name or not phone or not self.order_list:
-            messagebox.showerror("Missing Info", "Please fill in name, phone, and at least one meal.")
+    def apply_action(self, event):
+        # Undo and redo hand back an event to apply; cart changes happen here
+        # and now, order changes once the store write lands.
+        if event is None:
             return
+        action = event["action"]
+        if action == "cart_add":
+            self.desk.cart.insert(event["index"], event["meal"])
+            self.cart_listbox.insert(event["index"], event["meal"].summary())
+        elif action == "cart_remove":
+            self.desk.remove_meal(event["index"])
+            self.cart_listbox.delete(event["index"])
+        elif action == "void":
+            # Only an order the kitchen has not started can be taken back.
+            self.undo_pending = True
+            self.writer.move_from(event["order"]["id"], "Pending", VOID_STATUS,
+                                  done=lambda _: self.order_voided(event),
+                                  failed=lambda error: self.undo_failed(event, error))
+            return
+        elif action == "finalize":
+            self.undo_pending = True
+            self.writer.move_from(event["order"]["id"], VOID_STATUS, "Pending",
+                                  done=lambda _: self.order_restored(event),
+                                  failed=lambda error: self.undo_failed(event, error))
+            return
+        self.update_total()
+        self.log_action(event)
+
+    def order_voided(self, event):
+        self.undo_pending = False
+        order = event["order"]
+        self.summary.remove_order(order)
+        self.clear_form()
+        self.name_entry.insert(0, order["name"])
+        self.phone_entry.insert(0, order["phone"])
+        self.desk.cart.clear()
+        self.cart_listbox.delete(0, tk.END)
+        for meal in order["meals"]:
+            self.desk.cart.add(meal)
+            self.cart_listbox.insert(tk.END, meal.summary())
+        self.update_total()
+        self.log_action(event)
 
-        order = {
-            "name": name,
-            "phone": phone,
-            "meals": self.order_list,
-            "status": "Pending"
-        }
-
-        self.orders.append(order)
-        save_orders(self.orders)
-        messagebox.showinfo("Order Finalized", f"Order for {name} added with {len(self.order_list)} meals.")
-        self.order_list.clear()
+    def order_restored(self, event):
+        self.undo_pending = False
+        self.summary.add_order(dict(event["order"], status="Pending"))
+        self.desk.cart.clear()
         self.cart_listbox.delete(0, tk.END)
         self.update_total()
         self.clear_form()
+        self.log_action(event)
+
+    def undo_failed(self, event, error):
+        self.undo_pending = False
+        self.history.discard(event)
+        if isinstance(error, StaleOrderError):
+            messagebox.showwarning("Cannot Undo", "The kitchen has already moved this order.")
+        else:
+            messagebox.showerror("Save Failed", f"The order could not be changed: {error}")
+
+    def save_failed(self, error):
+        messagebox.showerror("Save Failed", f"An order could not be saved: {error}")
 
     def clear_form(self):
         self.name_entry.delete(0, tk.END)
@@ -225,37 +445,91 @@ class TakeoutApp(tk.Tk):
         self.special_frame.grid_remove()
 
     def view_summary(self):
-        self.orders = load_orders()  # Reload orders from file
+        # Everything already counted is skipped.
+        self.fold_changes()
+
         summary_win = tk.Toplevel(self)
         summary_win.title("Sales Summary")
-        total = 0
-        summary_text = ""
-        count = 1
-        for order in self.orders:
-            summary_text += f"{count}. {order['name']} ({order['phone']}):\n"
-            for meal in order.get("meals", []):
-                note = f" [Note: {meal['note']} (+${meal['extra_price']:.2f})]" if meal.get("note") else ""
-                summary_text += f"   - {meal['meal_type']}: {meal['details']} (${meal['price']:.2f}){note}\n"
-                total += meal['price']
-            count += 1
-        summary_text += f"\nTotal Sales: ${total:.2f}"
-
-        text_widget = tk.Text(summary_win, width=60, height=20)
-        text_widget.pack(padx=10, pady=10)
-        text_widget.insert(tk.END, summary_text)
-        text_widget.config(state="disabled")
+
+        totals_widget = tk.Text(summary_win, width=60, height=12)
+        totals_widget.pack(padx=10, pady=(10, 0))
+        totals_widget.insert(tk.END, self.summary.report())
+        totals_widget.config(state="disabled")
+
+        range_frame = ttk.Frame(summary_win)
+        range_frame.pack(pady=(5, 0))
+        ttk.Label(range_frame, text="From (YYYY-MM-DD):").pack(side="left")
+        start_entry = ttk.Entry(range_frame, width=12)
+        start_entry.insert(0, today())
+        start_entry.pack(side="left", padx=5)
+        ttk.Label(range_frame, text="To:").pack(side="left")
+        end_entry = ttk.Entry(range_frame, width=12)
+        end_entry.insert(0, today())
+        end_entry.pack(side="left", padx=5)
+
+        def show_range():
+            # Past days are read from their archive partitions only.
+            start_day, end_day = start_entry.get().strip(), end_entry.get().strip()
+            try:
+                with self.writer.mutex:
+                    report = SalesSummary(orders_between(start_day, end_day, self.store)).report()
+            except ValueError:
+                messagebox.showerror("Invalid Date", "Please enter dates as YYYY-MM-DD, the first on or before the second.")
+                return
+            totals_widget.config(state="normal")
+            totals_widget.delete("1.0", tk.END)
+            totals_widget.insert(tk.END, f"{start_day} to {end_day}\n{report}")
+            totals_widget.config(state="disabled")
+
+        ttk.Button(range_frame, text="Show", command=show_range).pack(side="left", padx=5)
+
+        detail_widget = tk.Text(summary_win, width=60, height=20)
+        detail_widget.pack(padx=10, pady=10)
+
+        nav_frame = ttk.Frame(summary_win)
+        nav_frame.pack(pady=(0, 10))
+        page_label = ttk.Label(nav_frame)
+        page = [0]
+
+        def show_page(delta):
+            # Only the orders on the visible page are ever formatted. The
+            # store swaps its list when another process archives orders, so
+            # it is read afresh on every page.
+            orders = self.store.orders
+            page_count = max(1, -(-len(orders) // SUMMARY_PAGE_SIZE))
+            page[0] = min(max(page[0] + delta, 0), page_count - 1)
+            start = page[0] * SUMMARY_PAGE_SIZE
+            lines = []
+            for number, order in enumerate(orders[start:start + SUMMARY_PAGE_SIZE], start + 1):
+                lines.extend(order_lines(number, order))
+            detail_widget.config(state="normal")
+            detail_widget.delete("1.0", tk.END)
+            detail_widget.insert(tk.END, "\n".join(lines))
+            detail_widget.config(state="disabled")
+            page_label.config(text=f"Page {page[0] + 1} of {page_count}")
+
+        ttk.Button(nav_frame, text="< Prev", command=lambda: show_page(-1)).pack(side="left", padx=5)
+        page_label.pack(side="left", padx=5)
+        ttk.Button(nav_frame, text="Next >", command=lambda: show_page(1)).pack(side="left", padx=5)
+        show_page(0)
 
     def reset_all(self):
-        if messagebox.askyesno("Reset Confirmation", "This will clear all orders and the saved menu. Proceed?"):
+        if messagebox.askyesno("Reset Confirmation", "This will clear all orders and the saved menu (both are kept in the archive). Proceed?"):
             if os.path.exists(MENU_FILE):
-                os.remove(MENU_FILE)
-            if os.path.exists(ORDERS_FILE):
-                os.remove(ORDERS_FILE)
-            self.orders = []
+                stash_file(MENU_FILE)
+            self.writer.close()
+            self.store.reset()
+            self.actions.record({"action": "reset"})
             self.menu = None
-            messagebox.showinfo("Reset", "Menu and orders have been cleared. The app will now close.")
+            messagebox.showinfo("Reset", "Menu and orders have been archived and cleared. The app will now close.")
             self.destroy()
 
+    def on_close(self):
+        # Anything still queued is written and synced before the window goes.
+        self.writer.close()
+        self.store.close()
+        self.destroy()
+
 if __name__ == "__main__":
     app = TakeoutApp()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+from types import MappingProxyType
+
+from order_records import price_cents, to_cents
+
+MENU_HISTORY_FILE = "menu_versions.jsonl"
+EMPTY_MENU = {"healthy_meal": {"name": {}}, "todays_special": {"meats": {}, "sides": []}}
+
+
+def menu_hash(menu):
+    data = json.dumps(menu, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+def healthy_sku(name):
+    return f"healthy:{name}"
+
+
+def meat_sku(name):
+    return f"meat:{name}"
+
+
+class CompiledMenu:
+    __slots__ = ("source", "version", "prices", "healthy_names", "meat_names", "side_names")
+
+    def __init__(self, menu):
+        menu = menu or EMPTY_MENU
+        healthy = menu.get("healthy_meal", {}).get("name", {})
+        special = menu.get("todays_special", {})
+        prices = {healthy_sku(name): price for name, price in healthy.items()}
+        prices.update({meat_sku(name): price for name, price in special.get("meats", {}).items()})
+
+        set_field = object.__setattr__
+        set_field(self, "source", menu)
+        set_field(self, "version", menu_hash(menu))
+        set_field(self, "prices", MappingProxyType(prices))
+        set_field(self, "healthy_names", tuple(healthy))
+        set_field(self, "meat_names", tuple(special.get("meats", {})))
+        set_field(self, "side_names", tuple(special.get("sides", [])))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CompiledMenu is immutable; compile a new one instead")
+
+    def price(self, sku):
+        return self.prices[sku]
+
+
+class MenuHistory:
+    # Every menu version orders were taken against, so an order's prices can
+    # be checked long after menu.json has moved on.
+    def __init__(self, path=MENU_HISTORY_FILE):
+        self.path = path
+        self.menus = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.menus[record["version"]] = CompiledMenu(record["menu"])
+
+    def remember(self, compiled):
+        if compiled.version in self.menus:
+            return
+        self.menus[compiled.version] = compiled
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"version": compiled.version, "menu": compiled.source}) + "\n")
+
+    def get(self, version):
+        return self.menus.get(version)
+
+    def check_prices(self, order):
+        compiled = self.menus.get(order.get("menu_version"))
+        if compiled is None:
+            return None
+        return [
+            meal for meal in order.get("meals", [])
+            if "sku" in meal and (meal["sku"] not in compiled.prices or
+                                  to_cents(compiled.prices[meal["sku"]]) != price_cents(meal) - to_cents(meal.get("extra_price", 0)))
+        ]
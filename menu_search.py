@@ -0,0 +1,51 @@
+import heapq
+
+from kitchen_core import HEALTHY_MEAL, SPECIAL_JOINER, TODAYS_SPECIAL
+from menu_catalog import healthy_sku, meat_sku
+
+MAX_MATCHES = 8
+
+
+def words(text):
+    return text.lower().replace(",", " ").split()
+
+
+class MenuSearch:
+    # Every orderable meal (each healthy option and each meat/side pairing)
+    # with a word-prefix index built once per menu, so a lookup is a few set
+    # intersections however long the menu is.
+    def __init__(self, menu):
+        self.entries = []
+        for option in menu.healthy_names:
+            self.entries.append((option, {"meal_type": HEALTHY_MEAL, "option": option},
+                                 menu.price(healthy_sku(option))))
+        for meat in menu.meat_names:
+            for side in menu.side_names:
+                self.entries.append((f"{meat}{SPECIAL_JOINER}{side}",
+                                     {"meal_type": TODAYS_SPECIAL, "meat": meat, "side": side},
+                                     menu.price(meat_sku(meat))))
+
+        self.prefixes = {}
+        for position, (label, _, _) in enumerate(self.entries):
+            for word in words(label):
+                for end in range(1, len(word) + 1):
+                    self.prefixes.setdefault(word[:end], set()).add(position)
+
+    def search(self, text, limit=MAX_MATCHES):
+        # Each typed word must start some word of the meal, in any order; so
+        # "stew ch mac" finds "Stew Chicken with Macaroni pie".
+        query = words(text)
+        if not query:
+            return []
+        matches = None
+        for word in sorted(query, key=len, reverse=True):
+            found = self.prefixes.get(word)
+            if not found:
+                return []
+            matches = set(found) if matches is None else matches & found
+            if not matches:
+                return []
+        text = text.strip().lower()
+        # Labels that start with what was typed come first, then menu order.
+        ranked = heapq.nsmallest(limit, matches, key=lambda p: (not self.entries[p][0].lower().startswith(text), p))
+        return [self.entries[position] for position in ranked]
@@ -1,180 +1,323 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import csv
+import itertools
 import json
-import os
+from kitchen_core import MENU_SECTIONS, OrderError, build_menu, load_menu, menu_rows, parse_price, save_menu
+from menu_catalog import menu_hash
+
+SECTION_LABELS = {"healthy": "Healthy Meal", "meat": "Special - Meat", "side": "Special - Side Combo"}
+COLUMNS = (("section", "Section", 150), ("name", "Name", 260), ("price", "Price", 80), ("problem", "Problem", 220))
+# Invalid rows listed in the save error; the rest are only flagged in the table.
+ERRORS_SHOWN = 10
+
+
+def split_pasted(line):
+    # Spreadsheets paste tab-separated cells; typed lists are usually commas.
+    if "\t" in line:
+        return [cell.strip() for cell in line.split("\t")]
+    return [cell.strip() for cell in next(csv.reader([line]), [])]
+
+
+class MenuModel:
+    # Every row of the menu lives here, keyed by a row id that doubles as the
+    # Treeview item id; the table only displays it.
+    def __init__(self, menu=None):
+        self.ids = itertools.count(1)
+        self.rows = {}
+        for row in menu_rows(menu or {}):
+            self.add(row["section"], row["name"], row["price"])
+
+    def add(self, section, name="", price=""):
+        row_id = str(next(self.ids))
+        self.rows[row_id] = {"section": section, "name": "", "price": ""}
+        self.update(row_id, "name", name)
+        self.update(row_id, "price", price)
+        return row_id
+
+    def update(self, row_id, field, value):
+        row = self.rows[row_id]
+        row[field] = str(value).strip()
+        # Sides have no price of their own.
+        if row["section"] == "side":
+            row["price"] = ""
+
+    def remove(self, row_ids):
+        for row_id in row_ids:
+            self.rows.pop(row_id, None)
+
+    def clear(self):
+        self.rows.clear()
+
+    def paste(self, text, section):
+        # One row per line: "name, price" goes into the chosen section, and
+        # "section, name, price" picks its own. A header line is skipped.
+        added = []
+        for line in text.splitlines():
+            cells = split_pasted(line)
+            if not cells or not any(cells) or cells[0].lower() == "section":
+                continue
+            if len(cells) >= 3 and cells[0].lower() in MENU_SECTIONS:
+                added.append(self.add(cells[0].lower(), cells[1], cells[2]))
+            else:
+                added.append(self.add(section, cells[0], cells[1] if len(cells) > 1 else ""))
+        return added
+
+    def ordered(self, search=""):
+        search = search.strip().lower()
+        row_ids = [row_id for row_id, row in self.rows.items() if search in row["name"].lower()]
+        return sorted(row_ids, key=lambda row_id: (MENU_SECTIONS.index(self.rows[row_id]["section"]), int(row_id)))
+
+    def validate(self):
+        # Checks every row in one pass and returns {row_id: problem}. Blank
+        # rows are skipped, as empty entries always were.
+        problems = {}
+        seen = set()
+        for row_id in self.ordered():
+            row = self.rows[row_id]
+            if not row["name"] and not row["price"]:
+                continue
+            if not row["name"]:
+                problems[row_id] = "Name is empty"
+                continue
+            key = (row["section"], row["name"].lower())
+            if key in seen:
+                problems[row_id] = "Same name as another row in this section"
+                continue
+            seen.add(key)
+            if row["section"] == "side":
+                continue
+            try:
+                parse_price(row["price"])
+            except ValueError:
+                problems[row_id] = "Price is missing" if not row["price"] else "Price must be a number, 0 or more"
+        return problems
+
+    def to_menu(self):
+        rows = {section: [] for section in MENU_SECTIONS}
+        for row_id in self.ordered():
+            row = self.rows[row_id]
+            if row["name"]:
+                rows[row["section"]].append(row["name"] if row["section"] == "side" else (row["name"], row["price"]))
+        return build_menu(rows["healthy"], rows["meat"], rows["side"])
 
-MENU_FILE = "menu.json"
 
 class MenuSetupApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Menu Setup")
 
-        # Section Labels
-        ttk.Label(root, text="Healthy Meal Options").grid(row=0, column=0, sticky="w")
-        self.healthy_frame = ttk.Frame(root)
-        self.healthy_frame.grid(row=1, column=0, padx=10, pady=5)
-
-        ttk.Label(root, text="Today's Special - Meats").grid(row=2, column=0, sticky="w")
-        self.meat_frame = ttk.Frame(root)
-        self.meat_frame.grid(row=3, column=0, padx=10, pady=5)
-
-        ttk.Label(root, text="Today's Special - Side Combos").grid(row=4, column=0, sticky="w")
-        self.side_frame = ttk.Frame(root)
-        self.side_frame.grid(row=5, column=0, padx=10, pady=5)
-
-        # Add Buttons
-        ttk.Button(root, text="+", command=self.add_healthy_meal).grid(row=1, column=1, sticky="n")
-        ttk.Button(root, text="+", command=self.add_meat).grid(row=3, column=1, sticky="n")
-        ttk.Button(root, text="+", command=self.add_side).grid(row=5, column=1, sticky="n")
-
-        # Save & Clear Buttons
-        self.save_button = ttk.Button(root, text="Save Menu", command=self.save_menu)
-        self.save_button.grid(row=6, column=0, pady=10, sticky="w", padx=10)
-
-        self.clear_button = ttk.Button(root, text="Clear", command=self.clear_menu)
-        self.clear_button.grid(row=6, column=1, pady=10, sticky="e", padx=10)
-
-        # Lists to track widgets
-        self.healthy_meals = []
-        self.meat_entries = []
-        self.side_entries = []
-
-        # Load existing menu if available
         existing_menu = self.load_existing_menu()
-
-        if existing_menu:
-            for name, price in existing_menu.get("healthy_meal", {}).get("name", {}).items():
-                self.add_healthy_meal(name, str(price))
-            for name, price in existing_menu.get("todays_special", {}).get("meats", {}).items():
-                self.add_meat(name, str(price))
-            for side in existing_menu.get("todays_special", {}).get("sides", []):
-                self.add_side(side)
-        else:
-            self.add_healthy_meal()
-            self.add_meat()
-            self.add_meat()
-            self.add_side()
-            self.add_side()
+        self.model = MenuModel(existing_menu)
+        # Hash of what is on disk, so saving an unchanged menu writes nothing.
+        self.saved_version = menu_hash(existing_menu) if existing_menu else None
+        self.problems = {}
+        self.editor = None
+
+        toolbar = ttk.Frame(root)
+        toolbar.grid(row=0, column=0, sticky="ew", padx=10, pady=(10, 5))
+        ttk.Label(toolbar, text="Search:").pack(side="left")
+        self.search_entry = ttk.Entry(toolbar, width=25)
+        self.search_entry.pack(side="left", padx=5)
+        self.search_entry.bind("<KeyRelease>", lambda e: self.refresh())
+        ttk.Label(toolbar, text="Section:").pack(side="left", padx=(15, 0))
+        self.section_combo = ttk.Combobox(toolbar, values=[SECTION_LABELS[s] for s in MENU_SECTIONS], state="readonly", width=20)
+        self.section_combo.current(0)
+        self.section_combo.pack(side="left", padx=5)
+        ttk.Button(toolbar, text="Add Row", command=self.add_row).pack(side="left")
+        ttk.Button(toolbar, text="Paste Rows", command=self.paste_rows).pack(side="left", padx=5)
+
+        table_frame = ttk.Frame(root)
+        table_frame.grid(row=1, column=0, sticky="nsew", padx=10)
+        root.grid_rowconfigure(1, weight=1)
+        root.grid_columnconfigure(0, weight=1)
+        self.tree = ttk.Treeview(table_frame, columns=[column for column, _, _ in COLUMNS], show="headings", height=20)
+        for column, heading, width in COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.tag_configure("error", foreground="red")
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.config(yscrollcommand=scrollbar.set)
+        self.tree.bind("<Double-Button-1>", self.begin_edit)
+        self.tree.bind("<Delete>", lambda e: self.remove_selected())
+        self.tree.bind("<Control-v>", lambda e: self.paste_rows())
+
+        button_frame = ttk.Frame(root)
+        button_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=10)
+        ttk.Button(button_frame, text="Remove Selected", command=self.remove_selected).pack(side="left")
+        ttk.Button(button_frame, text="Validate", command=self.validate).pack(side="left", padx=5)
+        self.save_button = ttk.Button(button_frame, text="Save Menu", command=self.save_menu)
+        self.save_button.pack(side="left")
+        self.clear_button = ttk.Button(button_frame, text="Clear", command=self.clear_menu)
+        self.clear_button.pack(side="left", padx=5)
+        self.status_label = ttk.Label(button_frame)
+        self.status_label.pack(side="right")
+
+        for row_id in self.model.ordered():
+            self.tree.insert("", "end", iid=row_id, values=self.row_values(row_id))
+        self.refresh()
 
     def load_existing_menu(self):
-        if os.path.exists(MENU_FILE):
-            try:
-                with open(MENU_FILE, "r") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                messagebox.showwarning("Warning", "Menu file is corrupted. Starting fresh.")
+        try:
+            return load_menu()
+        except json.JSONDecodeError:
+            messagebox.showwarning("Warning", "Menu file is corrupted. Starting fresh.")
         return None
 
-    def add_healthy_meal(self, name="", price=""):
-        name_entry = ttk.Entry(self.healthy_frame, width=25)
-        name_entry.insert(0, name)
-
-        price_entry = ttk.Entry(self.healthy_frame, width=10)
-        price_entry.insert(0, price)
-
-        remove_btn = ttk.Button(self.healthy_frame, text="−")
-        widget_tuple = (name_entry, price_entry, remove_btn)
-        self.healthy_meals.append(widget_tuple)
-        index = len(self.healthy_meals) - 1
-
-        name_entry.grid(row=index, column=0)
-        price_entry.grid(row=index, column=1)
-        remove_btn.config(command=lambda: self.remove_entry(self.healthy_meals, self.healthy_frame, widget_tuple))
-        remove_btn.grid(row=index, column=2)
-
-    def add_meat(self, name="", price=""):
-        name_entry = ttk.Entry(self.meat_frame, width=25)
-        name_entry.insert(0, name)
-
-        price_entry = ttk.Entry(self.meat_frame, width=10)
-        price_entry.insert(0, price)
-
-        remove_btn = ttk.Button(self.meat_frame, text="−")
-        widget_tuple = (name_entry, price_entry, remove_btn)
-        self.meat_entries.append(widget_tuple)
-        index = len(self.meat_entries) - 1
-
-        name_entry.grid(row=index, column=0)
-        price_entry.grid(row=index, column=1)
-        remove_btn.config(command=lambda: self.remove_entry(self.meat_entries, self.meat_frame, widget_tuple))
-        remove_btn.grid(row=index, column=2)
-
-    def add_side(self, text=""):
-        side_entry = ttk.Entry(self.side_frame, width=50)
-        side_entry.insert(0, text)
-
-        remove_btn = ttk.Button(self.side_frame, text="−")
-        widget_tuple = (side_entry, remove_btn)
-        self.side_entries.append(widget_tuple)
-        index = len(self.side_entries) - 1
-
-        side_entry.grid(row=index, column=0)
-        remove_btn.config(command=lambda: self.remove_entry(self.side_entries, self.side_frame, widget_tuple))
-        remove_btn.grid(row=index, column=1)
-
-    def remove_entry(self, entry_list, frame, widget_tuple):
-        if widget_tuple in entry_list:
-            for widget in widget_tuple:
-                widget.destroy()
-            entry_list.remove(widget_tuple)
-
-            for i, widgets in enumerate(entry_list):
-                for j, widget in enumerate(widgets):
-                    widget.grid(row=i, column=j)
+    def row_values(self, row_id):
+        row = self.model.rows[row_id]
+        return SECTION_LABELS[row["section"]], row["name"], row["price"], self.problems.get(row_id, "")
+
+    def show_row(self, row_id):
+        self.tree.item(row_id, values=self.row_values(row_id), tags=("error",) if row_id in self.problems else ())
+
+    def refresh(self):
+        # Rows outside the search are detached rather than deleted, so
+        # filtering a long menu never rebuilds the table.
+        shown = self.model.ordered(self.search_entry.get())
+        visible = set(shown)
+        for row_id in self.tree.get_children():
+            if row_id not in visible:
+                self.tree.detach(row_id)
+        for position, row_id in enumerate(shown):
+            self.tree.move(row_id, "", position)
+        self.status_label.config(text=f"{len(shown)} of {len(self.model.rows)} rows, {len(self.problems)} with problems")
+
+    def insert_rows(self, row_ids):
+        for row_id in row_ids:
+            self.tree.insert("", "end", iid=row_id, values=self.row_values(row_id))
+        self.search_entry.delete(0, tk.END)
+        self.refresh()
+
+    def selected_section(self):
+        return MENU_SECTIONS[self.section_combo.current()]
+
+    def add_row(self):
+        row_id = self.model.add(self.selected_section())
+        self.insert_rows([row_id])
+        self.tree.selection_set(row_id)
+        self.tree.see(row_id)
+        self.tree.update_idletasks()
+        self.edit_cell(row_id, "name")
+
+    def paste_rows(self):
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            messagebox.showwarning("Paste Rows", "The clipboard is empty.")
+            return "break"
+        row_ids = self.model.paste(text, self.selected_section())
+        self.insert_rows(row_ids)
+        self.validate()
+        return "break"
+
+    def remove_selected(self):
+        row_ids = self.tree.selection()
+        self.model.remove(row_ids)
+        self.tree.delete(*row_ids)
+        self.validate()
+
+    def begin_edit(self, event):
+        if self.tree.identify_region(event.x, event.y) != "cell":
+            return
+        row_id = self.tree.identify_row(event.y)
+        field = COLUMNS[int(self.tree.identify_column(event.x)[1:]) - 1][0]
+        if row_id and field != "problem":
+            self.edit_cell(row_id, field)
+
+    def edit_cell(self, row_id, field):
+        # One editor widget is laid over the cell being edited; Return or
+        # leaving the cell keeps the change, Escape drops it.
+        self.finish_edit()
+        bbox = self.tree.bbox(row_id, field)
+        if not bbox:
+            return
+        x, y, width, height = bbox
+        value = self.model.rows[row_id][field]
+        if field == "section":
+            editor = ttk.Combobox(self.tree, values=[SECTION_LABELS[s] for s in MENU_SECTIONS], state="readonly")
+            editor.set(SECTION_LABELS[value])
+            editor.bind("<<ComboboxSelected>>", lambda e: self.finish_edit())
+        else:
+            editor = ttk.Entry(self.tree)
+            editor.insert(0, value)
+            editor.select_range(0, tk.END)
+            editor.bind("<FocusOut>", lambda e: self.finish_edit())
+        editor.bind("<Return>", lambda e: self.finish_edit())
+        editor.bind("<Escape>", lambda e: self.cancel_edit())
+        editor.place(x=x, y=y, width=width, height=height)
+        editor.focus_set()
+        self.editor = (editor, row_id, field)
+
+    def finish_edit(self):
+        if self.editor is None:
+            return
+        editor, row_id, field = self.editor
+        self.editor = None
+        value = editor.get()
+        editor.destroy()
+        if row_id not in self.model.rows:
+            return
+        if field == "section":
+            value = MENU_SECTIONS[[SECTION_LABELS[s] for s in MENU_SECTIONS].index(value)]
+        self.model.update(row_id, field, value)
+        self.show_row(row_id)
+        if field == "section":
+            self.refresh()
+        if self.problems:
+            self.validate()
+
+    def cancel_edit(self):
+        if self.editor is not None:
+            self.editor[0].destroy()
+            self.editor = None
+
+    def validate(self):
+        # Only rows whose problem changed are redrawn.
+        problems, previous = self.model.validate(), self.problems
+        self.problems = problems
+        for row_id in set(problems) | set(previous):
+            if problems.get(row_id) != previous.get(row_id) and row_id in self.model.rows:
+                self.show_row(row_id)
+        self.refresh()
+        return problems
 
     def clear_menu(self):
-        for entries, frame in [(self.healthy_meals, self.healthy_frame),
-                               (self.meat_entries, self.meat_frame),
-                               (self.side_entries, self.side_frame)]:
-            for widgets in entries:
-                for widget in widgets:
-                    widget.destroy()
-            entries.clear()
+        self.cancel_edit()
+        self.tree.delete(*self.model.rows)
+        self.model.clear()
+        self.problems = {}
+        self.refresh()
 
     def save_menu(self):
-        menu = {}
-
-        # Healthy meals
-        healthy_options = {}
-        try:
-            for widgets in self.healthy_meals:
-                name = widgets[0].get().strip()
-                price = float(widgets[1].get())
-                if name:
-                    healthy_options[name] = price
-        except ValueError:
-            messagebox.showerror("Error", "Invalid price in healthy meal options.")
+        self.finish_edit()
+        problems = self.validate()
+        if problems:
+            lines = [f"{SECTION_LABELS[self.model.rows[row_id]['section']]} "
+                     f"'{self.model.rows[row_id]['name'] or '(no name)'}': {problem}"
+                     for row_id, problem in itertools.islice(problems.items(), ERRORS_SHOWN)]
+            if len(problems) > ERRORS_SHOWN:
+                lines.append(f"... and {len(problems) - ERRORS_SHOWN} more")
+            messagebox.showerror("Invalid Menu", f"{len(problems)} rows need fixing:\n\n" + "\n".join(lines))
             return
 
-        menu["healthy_meal"] = {"name": healthy_options}
-
-        # Meats
-        meats = {}
         try:
-            for widgets in self.meat_entries:
-                name = widgets[0].get().strip()
-                price = float(widgets[1].get())
-                if name:
-                    meats[name] = price
-        except ValueError:
-            messagebox.showerror("Error", "Invalid price in meat options.")
+            menu = self.model.to_menu()
+        except OrderError as e:
+            messagebox.showerror(e.title, str(e))
             return
 
-        # Sides
-        sides = [widgets[0].get().strip() for widgets in self.side_entries if widgets[0].get().strip()]
-
-        menu["todays_special"] = {
-            "meats": meats,
-            "sides": sides
-        }
-
-        with open(MENU_FILE, "w") as f:
-            json.dump(menu, f, indent=2)
-
+        version = menu_hash(menu)
+        if version == self.saved_version:
+            messagebox.showinfo("Saved", "No changes to save.")
+            return
+        save_menu(menu)
+        self.saved_version = version
         messagebox.showinfo("Saved", "Menu saved successfully.")
 
 if __name__ == "__main__":
     root = tk.Tk()
     app = MenuSetupApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
@@ -0,0 +1,157 @@
+import argparse
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from order_records import record_json
+
+ARCHIVE_DIR = "archive"
+# Orders taken after midnight but before this hour belong to the previous
+# business day.
+BUSINESS_DAY_START_HOUR = 4
+UNDATED = "undated"
+# Statuses an order never leaves on its own; these are what get archived.
+RETIRED_STATUSES = ("Finished", "Voided")
+
+
+def business_day(stamp):
+    return (datetime.fromisoformat(stamp) - timedelta(hours=BUSINESS_DAY_START_HOUR)).date().isoformat()
+
+
+def today():
+    return business_day(datetime.now().isoformat(timespec="seconds"))
+
+
+def day_start(day):
+    return f"{day}T{BUSINESS_DAY_START_HOUR:02d}:00:00"
+
+
+def order_day(order):
+    created = order.get("created")
+    return business_day(created) if created else UNDATED
+
+
+def is_retired(order, day):
+    # Finished or voided orders from an earlier business day leave the live
+    # store; anything still on the board stays no matter how old it is.
+    if order.get("status") not in RETIRED_STATUSES:
+        return False
+    order_date = order_day(order)
+    return order_date == UNDATED or order_date < day
+
+
+def partition_path(day, archive_dir=ARCHIVE_DIR):
+    return os.path.join(archive_dir, f"orders-{day}.jsonl.gz")
+
+
+def partition_days(archive_dir=ARCHIVE_DIR):
+    if not os.path.isdir(archive_dir):
+        return []
+    return sorted(
+        name[len("orders-"):-len(".jsonl.gz")]
+        for name in os.listdir(archive_dir)
+        if name.startswith("orders-") and name.endswith(".jsonl.gz")
+    )
+
+
+def append_partition(day, orders, archive_dir=ARCHIVE_DIR):
+    os.makedirs(archive_dir, exist_ok=True)
+    # Appending adds a new gzip member, which gzip.open reads back seamlessly.
+    with gzip.open(partition_path(day, archive_dir), "at", encoding="utf-8") as f:
+        for order in orders:
+            f.write(json.dumps(order, separators=(",", ":"), default=record_json) + "\n")
+
+
+def archive_orders(orders, archive_dir=ARCHIVE_DIR):
+    by_day = {}
+    for order in orders:
+        by_day.setdefault(order_day(order), []).append(order)
+    for day, day_orders in by_day.items():
+        append_partition(day, day_orders, archive_dir)
+    return len(orders)
+
+
+def stash_file(path, archive_dir=ARCHIVE_DIR):
+    # Moves a file into the archive under a timestamped name instead of
+    # deleting it.
+    os.makedirs(archive_dir, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    target = os.path.join(archive_dir, f"{stem}-{datetime.now():%Y%m%d-%H%M%S}{ext}")
+    os.replace(path, target)
+    return target
+
+
+def read_partition(day, archive_dir=ARCHIVE_DIR):
+    path = partition_path(day, archive_dir)
+    if not os.path.exists(path):
+        return
+    # A crash between archiving and rewriting the live store can archive an
+    # order twice; the first copy wins.
+    seen = set()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            order = json.loads(line)
+            if order["id"] not in seen:
+                seen.add(order["id"])
+                yield order
+
+
+def split_retired(orders, day=None):
+    day = day or today()
+    keep = []
+    retired = {}
+    for order in orders:
+        if is_retired(order, day):
+            retired.setdefault(order_day(order), []).append(order)
+        else:
+            keep.append(order)
+    return keep, retired
+
+
+def orders_between(start_day, end_day, store=None, archive_dir=ARCHIVE_DIR):
+    # Streams the orders of business days start_day..end_day inclusive, opening
+    # only the partitions in that range plus the live store. Both days are
+    # checked here, before anything is read, so a bad range raises ValueError
+    # at once instead of comparing as plain strings.
+    start, end = date.fromisoformat(start_day), date.fromisoformat(end_day)
+    if start > end:
+        raise ValueError(f"{start_day} is after {end_day}")
+    return stream_between(start.isoformat(), end.isoformat(), store, archive_dir)
+
+
+def stream_between(start_day, end_day, store, archive_dir):
+    seen = set()
+    for day in partition_days(archive_dir):
+        if start_day <= day <= end_day:
+            for order in read_partition(day, archive_dir):
+                seen.add(order["id"])
+                yield order
+    if store is not None:
+        for order in store.created_between(day_start(start_day), day_start((datetime.fromisoformat(end_day) + timedelta(days=1)).date().isoformat())):
+            if order["id"] not in seen:
+                yield order
+
+
+def main():
+    from order_store import open_store
+
+    parser = argparse.ArgumentParser(description="Archive finished orders from earlier business days")
+    parser.add_argument("--list", action="store_true", help="list archived partitions instead")
+    args = parser.parse_args()
+
+    if args.list:
+        for day in partition_days():
+            print(day)
+        return
+
+    store = open_store()
+    store.load()
+    archived = store.roll_over()
+    print(f"Archived {archived} orders; {len(store.orders)} remain live")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import contextlib
+import itertools
+import json
+import queue
+import socket
+import threading
+
+from order_index import OrderIndex, new_order_id
+from order_records import record_json
+from order_server import encode, split_address
+from order_store import SERVER_ADDRESS, StaleOrderError
+
+REQUEST_TIMEOUT = 10
+
+
+def request_once(op, address=SERVER_ADDRESS, **fields):
+    # One-off request on its own connection, for callers that do not hold a
+    # store (menu loading and saving).
+    with socket.create_connection(split_address(address), timeout=REQUEST_TIMEOUT) as sock:
+        sock.sendall(encode({"id": 0, "op": op, **fields}))
+        with sock.makefile("rb") as f:
+            for line in f:
+                reply = json.loads(line)
+                # Pushes and menu versions carry no request id.
+                if "id" in reply:
+                    return check_reply(reply)
+    raise ConnectionError("Order server closed the connection.")
+
+
+def check_reply(reply):
+    if "error" not in reply:
+        return reply.get("result")
+    if reply["kind"] == "stale":
+        raise StaleOrderError(reply["error"])
+    if reply["kind"] == "missing":
+        raise KeyError(reply["error"])
+    raise RuntimeError(reply["error"])
+
+
+class RemoteOrderStore:
+    # The store interface over a connection to order_server.py. Replies are
+    # matched to requests by id on a reader thread; changes pushed by the
+    # server queue up until poll() folds them into the local index, so the
+    # reader thread never touches the index itself.
+    def __init__(self, address=SERVER_ADDRESS):
+        self.address = address
+        self.index = OrderIndex()
+        self.orders = self.index.orders
+        self.request_ids = itertools.count(1)
+        self.waiting = {}
+        self.pushed = queue.Queue()
+        self.send_lock = threading.Lock()
+        # Kept current by the server, for kitchen_core.menu_key().
+        self.menu_version = None
+        self.sock = socket.create_connection(split_address(address))
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = threading.Thread(target=self.read_replies, name="order-client", daemon=True)
+        self.reader.start()
+
+    def read_replies(self):
+        try:
+            with self.sock.makefile("rb") as f:
+                for line in f:
+                    message = json.loads(line)
+                    if "push" in message:
+                        self.pushed.put((message["push"], message.get("gone", [])))
+                    elif "menu" in message:
+                        self.menu_version = message["menu"]
+                    else:
+                        slot = self.waiting.pop(message["id"], None)
+                        if slot is not None:
+                            slot.put(message)
+        except (OSError, ValueError):
+            pass
+        for slot in list(self.waiting.values()):
+            slot.put({"error": "Lost the connection to the order server.", "kind": "error"})
+
+    def request(self, op, **fields):
+        request_id = next(self.request_ids)
+        slot = self.waiting[request_id] = queue.Queue(maxsize=1)
+        data = (json.dumps({"id": request_id, "op": op, **fields}, separators=(",", ":"), default=record_json) + "\n").encode("utf-8")
+        with self.send_lock:
+            self.sock.sendall(data)
+        try:
+            reply = slot.get(timeout=REQUEST_TIMEOUT)
+        except queue.Empty:
+            self.waiting.pop(request_id, None)
+            raise TimeoutError(f"Order server did not answer {op} in time.") from None
+        return check_reply(reply)
+
+    def close(self):
+        with contextlib.suppress(OSError):
+            self.sock.shutdown(socket.SHUT_RDWR)
+        self.sock.close()
+
+    def load(self):
+        self.index = OrderIndex(self.request("load"))
+        self.orders = self.index.orders
+        self.take_pushed()
+        return self.orders
+
+    def take_pushed(self):
+        changed = set()
+        while True:
+            try:
+                orders, gone = self.pushed.get_nowait()
+            except queue.Empty:
+                return changed
+            for order in orders:
+                if self.apply(order):
+                    changed.add(order["id"])
+            gone = {oid for oid in gone if oid in self.index}
+            if gone:
+                self.index = OrderIndex([order for order in self.index.orders if order["id"] not in gone])
+                self.orders = self.index.orders
+                changed.update(gone)
+
+    def apply(self, fresh):
+        # Pushes can arrive before or after the reply that caused them, so an
+        # order only ever moves forward by version.
+        if not isinstance(fresh, dict) or fresh.get("id") is None:
+            return False
+        current = self.index.get(fresh["id"])
+        if current is None:
+            self.index.add(fresh)
+            return True
+        if fresh.get("version", 0) < current.get("version", 0) or current == fresh:
+            return False
+        self.index.replace(fresh["id"], fresh)
+        return True
+
+    def poll(self):
+        # Same order as OrderStore.poll(): removed orders come last, and get()
+        # returns None for them.
+        changed = self.take_pushed()
+        end = len(self.index)
+        return sorted(changed, key=lambda oid: self.index.position.get(oid, end))
+
+    def get(self, oid):
+        return self.index.get(oid)
+
+    def with_status(self, status):
+        return self.index.with_status(status)
+
+    def created_between(self, start, end):
+        return self.index.created_between(start, end)
+
+    def add_order(self, order):
+        order.setdefault("id", new_order_id())
+        oid = self.request("add_order", order=order)
+        self.apply(order)
+        return oid
+
+    def set_status(self, oid, status, expected_version=None):
+        self.apply(self.request("set_status", oid=oid, status=status, expected_version=expected_version))
+        return oid
+
+    @contextlib.contextmanager
+    def batch(self):
+        # Every request is already its own round trip to the server.
+        yield
+
+    def roll_over(self, day=None):
+        # The server archives its own store when it starts.
+        return 0
+
+    def compact(self):
+        self.request("compact")
+
+    def reset(self):
+        self.request("reset")
+        self.index = OrderIndex()
+        self.orders = self.index.orders
@@ -0,0 +1,100 @@
+import bisect
+import hashlib
+import json
+import uuid
+from datetime import datetime
+
+from order_records import Order, record_json
+
+LEGACY_ID_PREFIX = "legacy-"
+
+
+def new_order_id():
+    return uuid.uuid4().hex[:12]
+
+
+def content_id(order):
+    # Orders that arrive without an id get one from their content, so
+    # importing the same data twice skips them the second time instead of
+    # duplicating them.
+    data = json.dumps(order, sort_keys=True, separators=(",", ":"), default=record_json)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:12]
+
+
+def now_stamp():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def normalize_phone(phone):
+    digits = "".join(ch for ch in phone if ch.isdigit())
+    return digits or phone.strip()
+
+
+class OrderIndex:
+    def __init__(self, orders=()):
+        self.orders = []
+        self.by_id = {}
+        self.position = {}
+        self.by_status = {}
+        self.by_phone = {}
+        # (created, position) pairs kept sorted for date-range lookups.
+        self.by_created = []
+        for order in orders:
+            self.add(order)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, oid):
+        return oid in self.by_id
+
+    def add(self, order):
+        # Orders written before ids existed get one derived from their place
+        # in the history, which the append-only store never changes.
+        oid = order.get("id") or f"{LEGACY_ID_PREFIX}{len(self.orders)}"
+        if oid in self.by_id:
+            return None
+        order = Order.from_dict(order)
+        order.id = oid
+        position = len(self.orders)
+        self.orders.append(order)
+        self.by_id[oid] = order
+        self.position[oid] = position
+        self.by_status.setdefault(order.get("status", "Pending"), {})[oid] = order
+        self.by_phone.setdefault(normalize_phone(order.get("phone", "")), []).append(oid)
+        bisect.insort(self.by_created, (order.get("created", ""), position))
+        return oid
+
+    def set_status(self, oid, status, version, at=None):
+        order = self.by_id[oid]
+        old_status = order.get("status", "Pending")
+        if old_status != status:
+            del self.by_status[old_status][oid]
+            self.by_status.setdefault(status, {})[oid] = order
+            # Each move is kept as [status, entered_at]; the order's stay in
+            # Pending starts at its "created" stamp.
+            if at:
+                if order.history is None:
+                    order.history = []
+                order.history.append([status, at])
+        order.status = status
+        order.version = version
+
+    def replace(self, oid, fresh):
+        # Update in place so widgets holding the record see the new state.
+        self.set_status(oid, fresh.get("status", "Pending"), fresh.get("version", 0))
+        self.by_id[oid].assign(fresh)
+
+    def get(self, oid):
+        return self.by_id.get(oid)
+
+    def with_status(self, status):
+        return list(self.by_status.get(status, {}).values())
+
+    def for_phone(self, phone):
+        return [self.by_id[oid] for oid in self.by_phone.get(normalize_phone(phone), [])]
+
+    def created_between(self, start, end):
+        lo = bisect.bisect_left(self.by_created, (start,))
+        hi = bisect.bisect_left(self.by_created, (end,))
+        return [self.orders[position] for _, position in self.by_created[lo:hi]]
@@ -0,0 +1,151 @@
+import argparse
+import bisect
+import csv
+import json
+from datetime import datetime, timedelta
+
+from kitchen_core import STATUS_ORDER
+
+WINDOW_MINUTES = 60
+PERCENTILES = (50, 95, 99)
+EXPORT_FIELDS = ("id", "status", "entered", "left", "seconds")
+
+
+def seconds_between(start, end):
+    return (datetime.fromisoformat(end) - datetime.fromisoformat(start)).total_seconds()
+
+
+def stays(order):
+    # (status, entered, left) for every status the order has already left.
+    entered_status, entered = "Pending", order.get("created")
+    for status, at in order.get("history", []):
+        if entered:
+            yield entered_status, entered, at
+        entered_status, entered = status, at
+
+
+def percentile(values, p):
+    # Nearest-rank percentile of an already sorted list.
+    if not values:
+        return None
+    return values[max(-(-p * len(values) // 100), 1) - 1]
+
+
+class OrderMetrics:
+    # Time-in-status and throughput over a rolling window. Timestamps are kept
+    # as ISO strings in sorted lists, and each order's history is only read
+    # past the point the previous observe() reached.
+    def __init__(self, orders=(), window_minutes=WINDOW_MINUTES):
+        self.window = timedelta(minutes=window_minutes)
+        self.seen = {}
+        self.durations = {status: [] for status in STATUS_ORDER}
+        self.created = []
+        self.finished = []
+        for order in orders:
+            self.observe(order)
+
+    def observe(self, order):
+        oid = order["id"]
+        history = order.get("history", [])
+        if oid not in self.seen:
+            start = 0
+            entered_status, entered = "Pending", order.get("created")
+            if entered:
+                bisect.insort(self.created, entered)
+        else:
+            start = self.seen[oid]
+            entered_status, entered = history[start - 1] if start else ("Pending", order.get("created"))
+        for status, at in history[start:]:
+            if entered:
+                bisect.insort(self.durations.setdefault(entered_status, []), (at, seconds_between(entered, at)))
+            if status == "Finished":
+                bisect.insort(self.finished, at)
+            entered_status, entered = status, at
+        self.seen[oid] = len(history)
+
+    def trim(self, now):
+        cutoff = (now - self.window).isoformat(timespec="seconds")
+        for values in self.durations.values():
+            del values[:bisect.bisect_left(values, (cutoff,))]
+        for values in (self.created, self.finished):
+            del values[:bisect.bisect_left(values, cutoff)]
+
+    def snapshot(self, now=None):
+        now = now or datetime.now()
+        self.trim(now)
+        minutes = self.window.total_seconds() / 60
+        time_in_status = {}
+        for status, values in self.durations.items():
+            if values:
+                seconds = sorted(duration for _, duration in values)
+                time_in_status[status] = {"count": len(seconds), **{f"p{p}": percentile(seconds, p) for p in PERCENTILES}}
+        return {
+            "at": now.isoformat(timespec="seconds"),
+            "window_minutes": minutes,
+            "created_per_minute": len(self.created) / minutes,
+            "finished_per_minute": len(self.finished) / minutes,
+            "time_in_status": time_in_status,
+        }
+
+    def report(self, now=None):
+        snapshot = self.snapshot(now)
+        lines = [
+            f"Last {snapshot['window_minutes']:g} minutes to {snapshot['at']}",
+            f"Orders in: {snapshot['created_per_minute']:.2f}/min    Finished: {snapshot['finished_per_minute']:.2f}/min",
+        ]
+        for status, stats in snapshot["time_in_status"].items():
+            spread = "  ".join(f"p{p} {stats[f'p{p}'] / 60:.1f}m" for p in PERCENTILES)
+            lines.append(f"   {status}: {stats['count']} moves  {spread}")
+        return "\n".join(lines)
+
+
+def export_stays(orders, path):
+    # One row per completed stay; .csv gets CSV, anything else JSON Lines.
+    rows = (
+        dict(zip(EXPORT_FIELDS, (order["id"], status, entered, left, seconds_between(entered, left))))
+        for order in orders
+        for status, entered, left in stays(order)
+    )
+    count = 0
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, EXPORT_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(row, separators=(",", ":")) + "\n")
+                count += 1
+    return count
+
+
+def main():
+    from order_archive import orders_between, today
+    from order_store import open_store
+
+    parser = argparse.ArgumentParser(description="Time-in-status percentiles and throughput for the order board")
+    parser.add_argument("--from", dest="start", default=None, help="first business day (YYYY-MM-DD), default today")
+    parser.add_argument("--to", dest="end", default=None, help="last business day, default the first")
+    parser.add_argument("--window", type=float, default=WINDOW_MINUTES, help="rolling window in minutes")
+    parser.add_argument("--at", default=None, help="end of the window (ISO time), default now")
+    parser.add_argument("--json", action="store_true", help="print the snapshot as one JSON line")
+    parser.add_argument("--export", help="write every status stay to this .csv or .jsonl file")
+    args = parser.parse_args()
+
+    start = args.start or today()
+    store = open_store()
+    store.load()
+    orders = list(orders_between(start, args.end or start, store))
+    store.close()
+
+    metrics = OrderMetrics(orders, args.window)
+    now = datetime.fromisoformat(args.at) if args.at else None
+    print(json.dumps(metrics.snapshot(now)) if args.json else metrics.report(now))
+    if args.export:
+        print(f"Wrote {export_stays(orders, args.export)} stays to {args.export}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import sys
+
+ORDER_FIELDS = ("id", "created", "name", "phone", "meals", "status", "version", "menu_version", "history")
+MEAL_FIELDS = ("meal_type", "details", "note", "extra_price", "price", "sku", "meat", "side")
+MONEY_FIELDS = {"price": "price_cents", "extra_price": "extra_cents"}
+
+
+def to_cents(amount):
+    return int(round(float(amount) * 100))
+
+
+def price_cents(meal):
+    # Meals read back from archives or other tools may still be plain dicts.
+    cents = getattr(meal, "price_cents", None)
+    return to_cents(meal["price"]) if cents is None else cents
+
+
+def shared(text):
+    # Meal names, notes and statuses repeat across thousands of orders; one
+    # interned copy of each is enough.
+    return sys.intern(text) if isinstance(text, str) else text
+
+
+def format_cents(cents):
+    return f"${cents // 100}.{cents % 100:02d}" if cents >= 0 else f"-{format_cents(-cents)}"
+
+
+def record_json(value):
+    # json.dump(default=record_json) writes records in the plain JSON schema.
+    if isinstance(value, (Order, Meal)):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class Record:
+    # Read access like the dicts these replace, so code that only looks at
+    # order["status"] or meal.get("note") works on either. Fields that were
+    # absent from the JSON stay None and read as missing.
+    __slots__ = ()
+    FIELDS = ()
+
+    def __getitem__(self, key):
+        value = self.field(key) if key in self.FIELDS else (self.extra or {}).get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __eq__(self, other):
+        if isinstance(other, (Record, dict)):
+            return self.to_dict() == (other if isinstance(other, dict) else other.to_dict())
+        return NotImplemented
+
+    def field(self, key):
+        return getattr(self, key)
+
+    def items(self):
+        return self.to_dict().items()
+
+    def to_dict(self):
+        record = {key: self.field(key) for key in self.FIELDS if self.field(key) is not None}
+        record.update(self.extra or {})
+        return record
+
+
+class Meal(Record):
+    __slots__ = ("meal_type", "details", "note", "extra_cents", "price_cents", "sku", "meat", "side", "extra",
+                 "summary_text")
+    FIELDS = MEAL_FIELDS
+
+    def __init__(self, meal_type, details, price_cents, note="", extra_cents=0, sku=None, meat=None, side=None,
+                 extra=None):
+        self.meal_type = meal_type
+        self.details = details
+        self.note = note
+        self.extra_cents = extra_cents
+        self.price_cents = price_cents
+        self.sku = sku
+        self.meat = meat
+        self.side = side
+        self.extra = extra
+        self.summary_text = None
+
+    @classmethod
+    def from_dict(cls, meal):
+        if isinstance(meal, cls):
+            return meal
+        extra = {key: value for key, value in meal.items() if key not in MEAL_FIELDS}
+        return cls(
+            shared(meal.get("meal_type")),
+            shared(meal.get("details")),
+            to_cents(meal.get("price", 0)),
+            shared(meal.get("note")),
+            to_cents(meal["extra_price"]) if "extra_price" in meal else None,
+            shared(meal.get("sku")),
+            shared(meal.get("meat")),
+            shared(meal.get("side")),
+            extra or None,
+        )
+
+    def field(self, key):
+        if key in MONEY_FIELDS:
+            cents = getattr(self, MONEY_FIELDS[key])
+            return None if cents is None else cents / 100
+        return getattr(self, key)
+
+    def summary(self):
+        if self.summary_text is None:
+            self.summary_text = f"{self.details} - {format_cents(self.price_cents)}"
+            if self.note:
+                self.summary_text += f" (Note: {self.note})"
+        return self.summary_text
+
+
+class Order(Record):
+    __slots__ = ("id", "created", "name", "phone", "meals", "status", "version", "menu_version", "history", "extra",
+                 "card_text")
+    FIELDS = ORDER_FIELDS
+
+    def __init__(self, id=None, created=None, name=None, phone=None, meals=(), status=None, version=None,
+                 menu_version=None, history=None, extra=None):
+        self.id = id
+        self.created = created
+        self.name = name
+        self.phone = phone
+        self.meals = tuple(Meal.from_dict(meal) for meal in meals)
+        self.status = status
+        self.version = version
+        self.menu_version = menu_version
+        self.history = history
+        self.extra = extra
+        self.card_text = None
+
+    @classmethod
+    def from_dict(cls, order):
+        if isinstance(order, cls):
+            return order
+        extra = {key: value for key, value in order.items() if key not in ORDER_FIELDS}
+        return cls(order.get("id"), order.get("created"), order.get("name"), order.get("phone"),
+                   order.get("meals", ()), shared(order.get("status")), order.get("version"),
+                   shared(order.get("menu_version")), order.get("history"), extra or None)
+
+    def to_dict(self):
+        record = super().to_dict()
+        record["meals"] = [meal.to_dict() for meal in self.meals]
+        return record
+
+    def assign(self, fresh):
+        # Refreshes this record in place so widgets holding it see the change.
+        fresh = Order.from_dict(fresh)
+        for name in Order.__slots__:
+            setattr(self, name, getattr(fresh, name))
+
+    def total_cents(self):
+        return sum(meal.price_cents for meal in self.meals)
+
+    def card(self):
+        # The board redraws cards constantly but an order's meals never change,
+        # so the text is built once per order.
+        if self.card_text is None:
+            meals_text = "\n".join(
+                f"- {meal.meal_type}: {meal.details} ({format_cents(meal.price_cents)})" +
+                (f" [Note: {meal.note}]" if meal.note else "")
+                for meal in self.meals
+            )
+            ready_by = self.get("ready_by")
+            ready_text = f"Ready by: {ready_by[11:16]}\n" if ready_by else ""
+            self.card_text = (f"{self.name} – {len(self.meals)} meals",
+                              f"Phone: {self.phone or ''}\n{ready_text}Meals:\n{meals_text}\n")
+        return self.card_text
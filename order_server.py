@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import json
+import sys
+
+import kitchen_core
+from menu_catalog import menu_hash
+from order_records import record_json
+from order_store import BACKEND, SERVER_ADDRESS, StaleOrderError, open_store
+
+POLL_SECONDS = 0.5
+# Requests are single lines; this only has to fit the largest order.
+LINE_LIMIT = 1 << 20
+# A terminal that stops reading is dropped once this much is queued for it.
+MAX_CLIENT_BUFFER = 8 << 20
+
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":"), default=record_json) + "\n").encode("utf-8")
+
+
+def split_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class OrderServer:
+    # Owns the one order store and serves it to every terminal over
+    # newline-delimited JSON. Each request gets a reply carrying its "id";
+    # every change is also pushed to all connected terminals as
+    # {"push": [order, ...]}.
+    def __init__(self, store):
+        self.store = store
+        self.clients = set()
+        self.menu_key = None
+        self.menu_version = None
+
+    async def handle(self, reader, writer):
+        self.clients.add(writer)
+        # Terminals learn the menu version here and from later pushes, so
+        # their hot-reload check never needs a request of its own.
+        writer.write(encode({"menu": self.current_menu_version()}))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                reply, changed = self.dispatch(request)
+                reply["id"] = request.get("id")
+                writer.write(encode(reply))
+                self.push(changed)
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    def dispatch(self, request):
+        op = request.get("op")
+        changed = []
+        try:
+            if op == "load":
+                result = self.store.orders
+            elif op == "add_order":
+                result = self.store.add_order(request["order"])
+                changed.append(result)
+            elif op == "set_status":
+                oid = self.store.set_status(request["oid"], request["status"], request.get("expected_version"))
+                changed.append(oid)
+                result = self.store.get(oid)
+            elif op == "compact":
+                result = self.store.compact()
+            elif op == "reset":
+                # Every order goes, and terminals hear which.
+                changed.extend(order["id"] for order in self.store.orders)
+                result = self.store.reset()
+            elif op == "menu":
+                menu = kitchen_core.load_menu()
+                result = {"menu": menu, "version": menu_hash(menu) if menu else None}
+            elif op == "menu_version":
+                result = self.current_menu_version()
+            elif op == "save_menu":
+                result = kitchen_core.save_menu(request["menu"])
+            else:
+                return {"error": f"Unknown request: {op}", "kind": "error"}, changed
+        except StaleOrderError as e:
+            return {"error": str(e), "kind": "stale"}, changed
+        except KeyError as e:
+            return {"error": f"Unknown order: {e}", "kind": "missing"}, changed
+        except Exception as e:
+            return {"error": str(e), "kind": "error"}, changed
+        return {"result": result}, changed
+
+    def current_menu_version(self):
+        # The menu is only re-read and re-hashed when its file moves.
+        key = kitchen_core.menu_key()
+        if key != self.menu_key:
+            try:
+                menu = kitchen_core.load_menu()
+            except ValueError:
+                return self.menu_version
+            self.menu_version = menu_hash(menu) if menu else None
+            self.menu_key = key
+        return self.menu_version
+
+    def push(self, changed):
+        # A re-sent order comes back from add_order as None. Orders archived
+        # or reset away go out by id under "gone".
+        orders = []
+        gone = []
+        for oid in changed:
+            if oid is None:
+                continue
+            order = self.store.get(oid)
+            if order is None:
+                gone.append(oid)
+            else:
+                orders.append(order)
+        if orders or gone:
+            self.broadcast(encode({"push": orders, "gone": gone}))
+
+    def broadcast(self, message):
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+            elif writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.clients.discard(writer)
+                writer.close()
+            else:
+                writer.write(message)
+
+    async def watch_store(self):
+        # Picks up writes made outside the server, such as the archive or
+        # import tools, so terminals see those too.
+        while True:
+            await asyncio.sleep(POLL_SECONDS)
+            self.push(self.store.poll())
+            version = self.menu_version
+            if self.current_menu_version() != version:
+                self.broadcast(encode({"menu": self.menu_version}))
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        print(f"Serving orders on {host}:{port}", flush=True)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.watch_store())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the order store to counter and kitchen terminals")
+    parser.add_argument("--address", default=SERVER_ADDRESS, help="host:port to listen on")
+    args = parser.parse_args()
+
+    if BACKEND == "remote":
+        sys.exit("The server needs a local store: run it with KITCHEN_BACKEND=json or sqlite.")
+    store = open_store()
+    store.load()
+    store.roll_over()
+    try:
+        asyncio.run(OrderServer(store).serve(*split_address(args.address)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+import contextlib
+import json
+import os
+
+from order_archive import ARCHIVE_DIR, append_partition, archive_orders, split_retired
+from order_index import OrderIndex, new_order_id, now_stamp
+from order_records import record_json
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+ORDERS_FILE = "orders.json"
+JOURNAL_FILE = "orders.journal"
+
+# "json" keeps orders in orders.json plus its journal; "sqlite" uses DB_FILE;
+# "remote" talks to an order_server.py at SERVER_ADDRESS.
+BACKEND = os.environ.get("KITCHEN_BACKEND", "json")
+DB_FILE = os.environ.get("KITCHEN_DB", "kitchen.db")
+SERVER_ADDRESS = os.environ.get("KITCHEN_SERVER", "127.0.0.1:8765")
+
+# Once the journal grows past this many bytes its events are folded into the
+# orders.json snapshot and the journal starts over.
+COMPACT_BYTES = 256 * 1024
+
+
+def read_snapshot(path=ORDERS_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f) or []
+    return []
+
+
+def write_snapshot(orders, path=ORDERS_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(orders, f, indent=2, default=record_json)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def apply_event(index, event):
+    op = event.get("op")
+    if op == "create":
+        # OrderIndex.add ignores ids it already holds, so replaying a journal
+        # that was already folded into the snapshot (a crash between the two
+        # steps of compaction) does not duplicate orders.
+        return index.add(event["order"])
+    if op == "status":
+        order = index.get(event["id"])
+        if order is not None:
+            index.set_status(event["id"], event["status"], event.get("version", order.get("version", 0) + 1), event.get("at"))
+            return event["id"]
+    return None
+
+
+def stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def lock_file(fd, shared=False):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+
+
+def unlock_file(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def load_orders(orders_file=ORDERS_FILE, journal_file=JOURNAL_FILE):
+    return OrderStore(orders_file, journal_file).load()
+
+
+def open_store():
+    if BACKEND == "remote":
+        from order_client import RemoteOrderStore
+        return RemoteOrderStore(SERVER_ADDRESS)
+    if BACKEND == "sqlite":
+        from sqlite_store import SqliteOrderStore
+        return SqliteOrderStore(DB_FILE)
+    return OrderStore()
+
+
+class StaleOrderError(Exception):
+    pass
+
+
+def move_from(store, oid, from_status, to_status):
+    # Undo and redo only move an order that is still where the action left
+    # it; one moved since by another terminal raises instead.
+    order = store.get(oid)
+    if order is None:
+        raise KeyError(oid)
+    if order.get("status", "Pending") != from_status:
+        raise StaleOrderError(f"Order {oid} is in {order.get('status', 'Pending')}, expected {from_status}.")
+    return store.set_status(oid, to_status, order.get("version", 0))
+
+
+class OrderStore:
+    def __init__(self, orders_file=ORDERS_FILE, journal_file=JOURNAL_FILE, lock_file=None, compact_bytes=COMPACT_BYTES,
+                 archive_dir=ARCHIVE_DIR):
+        self.orders_file = orders_file
+        self.journal_file = journal_file
+        self.lock_path = lock_file or os.path.splitext(orders_file)[0] + ".lock"
+        self.compact_bytes = compact_bytes
+        self.archive_dir = archive_dir
+        self.index = OrderIndex()
+        self.orders = self.index.orders
+        self.snapshot_key = None
+        self.journal_offset = 0
+        self.changed = set()
+        self.lock_fd = None
+        self.lock_depth = 0
+        self.buffer = None
+
+    @contextlib.contextmanager
+    def locked(self, shared=False):
+        # Re-entrant within one store: compaction and catch-up run inside the
+        # exclusive lock taken for a write.
+        if self.lock_depth == 0:
+            if self.lock_fd is None:
+                self.lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            lock_file(self.lock_fd, shared)
+        self.lock_depth += 1
+        try:
+            yield
+        finally:
+            self.lock_depth -= 1
+            if self.lock_depth == 0:
+                unlock_file(self.lock_fd)
+
+    def close(self):
+        if self.lock_fd is not None:
+            os.close(self.lock_fd)
+            self.lock_fd = None
+
+    def load(self):
+        with self.locked(shared=True):
+            self.index = self.rebuild()
+        self.orders = self.index.orders
+        self.changed.clear()
+        return self.orders
+
+    def roll_over(self, day=None):
+        # The live store only holds the current business day plus whatever is
+        # still on the board; finished orders from earlier days move to
+        # compressed per-day partitions so startup cost stays flat. Only the
+        # apps and order_archive.py call this; load() never writes.
+        with self.locked():
+            self.catch_up()
+            keep, retired = split_retired(self.orders, day)
+            for retired_day, orders in retired.items():
+                append_partition(retired_day, orders, self.archive_dir)
+            if retired:
+                write_snapshot(keep, self.orders_file)
+                open(self.journal_file, "wb").close()
+                self.snapshot_key = stat_key(self.orders_file)
+                self.journal_offset = 0
+                self.index = OrderIndex(keep)
+                self.orders = self.index.orders
+        return sum(len(orders) for orders in retired.values())
+
+    def rebuild(self):
+        self.snapshot_key = stat_key(self.orders_file)
+        index = OrderIndex(read_snapshot(self.orders_file))
+        self.journal_offset = 0
+        self.read_tail(index)
+        return index
+
+    def read_tail(self, index):
+        changed = set()
+        size = file_size(self.journal_file)
+        if size <= self.journal_offset:
+            return changed
+
+        with open(self.journal_file, "rb") as f:
+            f.seek(self.journal_offset)
+            data = f.read(size - self.journal_offset)
+
+        # Leave a half-written last line for the next read.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            oid = apply_event(index, event)
+            if oid is not None:
+                changed.add(oid)
+        self.journal_offset += end
+        return changed
+
+    def poll(self):
+        # Ids of orders changed since the last poll. Orders another process
+        # archived or reset away come last, and get() returns None for them.
+        self.catch_up()
+        end = len(self.index)
+        changed = sorted(self.changed, key=lambda oid: self.index.position.get(oid, end))
+        self.changed.clear()
+        return changed
+
+    def is_stale(self):
+        return (stat_key(self.orders_file) != self.snapshot_key
+                or file_size(self.journal_file) != self.journal_offset)
+
+    def catch_up(self):
+        # The unlocked stat() check keeps an idle poll cheap; anything that
+        # reads file contents does so under the shared lock so it never sees
+        # a compaction half done.
+        if not self.is_stale():
+            return
+        with self.locked(shared=True):
+            if (stat_key(self.orders_file) != self.snapshot_key
+                    or file_size(self.journal_file) < self.journal_offset):
+                self.merge(self.rebuild())
+            else:
+                self.changed.update(self.read_tail(self.index))
+
+    def merge(self, index):
+        # The other app compacted the journal away; fold the rebuilt state in
+        # place so callers holding order records keep seeing live objects.
+        gone = [oid for oid in self.index.by_id if oid not in index]
+        if gone:
+            # It also archived or reset orders away. The snapshot is the
+            # truth, so they are dropped here too rather than written back by
+            # our next compaction.
+            kept = []
+            for order in index.orders:
+                current = self.index.get(order["id"])
+                if current is None:
+                    self.changed.add(order["id"])
+                    current = order
+                elif current != order:
+                    current.assign(order)
+                    self.changed.add(order["id"])
+                kept.append(current)
+            self.index = OrderIndex(kept)
+            self.orders = self.index.orders
+            self.changed.update(gone)
+            return
+        for order in index.orders:
+            oid = order["id"]
+            if oid not in self.index:
+                self.index.add(order)
+                self.changed.add(oid)
+            elif self.index.get(oid) != order:
+                self.index.replace(oid, order)
+                self.changed.add(oid)
+
+    def get(self, oid):
+        return self.index.get(oid)
+
+    def with_status(self, status):
+        return self.index.with_status(status)
+
+    def created_between(self, start, end):
+        return self.index.created_between(start, end)
+
+    def add_order(self, order):
+        order.setdefault("id", new_order_id())
+        with self.locked():
+            self.catch_up()
+            return self.commit({"op": "create", "order": order})
+
+    def set_status(self, oid, status, expected_version=None):
+        with self.locked():
+            self.catch_up()
+            order = self.index.get(oid)
+            if order is None:
+                raise KeyError(oid)
+            version = order.get("version", 0)
+            if expected_version is not None and version != expected_version:
+                raise StaleOrderError(f"Order {oid} is at version {version}, expected {expected_version}.")
+            return self.commit({"op": "status", "id": oid, "status": status, "version": version + 1, "at": now_stamp()})
+
+    @contextlib.contextmanager
+    def batch(self):
+        # Writes inside the block are applied in memory right away and reach
+        # the journal as one append and one fsync when it closes.
+        with self.locked():
+            self.catch_up()
+            self.buffer = []
+            try:
+                yield
+            finally:
+                data, self.buffer = b"".join(self.buffer), None
+                if data:
+                    with open(self.journal_file, "ab") as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                        self.journal_offset = f.tell()
+                    if self.journal_offset >= self.compact_bytes:
+                        self.compact()
+
+    def commit(self, event):
+        # Callers hold the exclusive lock and have caught up, so the journal
+        # ends exactly at our offset and the event lands right there.
+        data = (json.dumps(event, separators=(",", ":"), default=record_json) + "\n").encode("utf-8")
+        if self.buffer is not None:
+            self.buffer.append(data)
+            return apply_event(self.index, event)
+        with open(self.journal_file, "ab") as f:
+            f.write(data)
+            f.flush()
+            self.journal_offset = f.tell()
+        oid = apply_event(self.index, event)
+        if self.journal_offset >= self.compact_bytes:
+            self.compact()
+        return oid
+
+    def compact(self):
+        with self.locked():
+            self.catch_up()
+            write_snapshot(self.orders, self.orders_file)
+            open(self.journal_file, "wb").close()
+            self.snapshot_key = stat_key(self.orders_file)
+            self.journal_offset = 0
+
+    def reset(self):
+        # Every order still live goes to its day's archive partition first,
+        # so a reset never loses anything.
+        with self.locked():
+            self.catch_up()
+            archive_orders(self.orders, self.archive_dir)
+            for path in (self.orders_file, self.journal_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.index = OrderIndex()
+            self.orders = self.index.orders
+            self.snapshot_key = None
+            self.journal_offset = 0
+            self.changed.clear()
@@ -0,0 +1,116 @@
+import argparse
+from datetime import datetime, timedelta
+
+from order_metrics import seconds_between
+from prep_summary import prep_items
+
+# Weight of the newest observation in every running average.
+ALPHA = 0.2
+# Used until the kitchen has produced any history.
+DEFAULT_ITEM_SECONDS = 240
+DEFAULT_START_GAP = 90
+
+
+def ewma(current, sample, alpha=ALPHA):
+    return sample if current is None else current + alpha * (sample - current)
+
+
+def item_keys(order):
+    return [f"{kind}:{name}" for kind, name in prep_items(order)]
+
+
+class PickupEstimator:
+    # Learns from the [status, at] history the board writes on every move:
+    #   - cook time per item, from each order's Prepping -> Pick-Up stay
+    #     split evenly over its items;
+    #   - the start gap, how long the kitchen takes to pick up the next
+    #     waiting order, from each Pending -> Prepping move.
+    # Both are exponentially weighted, so each move costs one update per
+    # item and old rushes fade out.
+    def __init__(self, orders=(), alpha=ALPHA):
+        self.alpha = alpha
+        self.seen = {}
+        self.item_seconds = {}
+        self.any_item = None
+        self.start_gap = None
+        self.last_start = None
+        # History read back at startup is replayed in time order, so the
+        # start gaps come out the same as if they had been watched live.
+        moves = [move for order in orders for move in self.new_moves(order)]
+        for move in sorted(moves, key=lambda move: move[0]):
+            self.apply(*move)
+
+    def new_moves(self, order):
+        # (at, status, previous status, entered previous, order) for history
+        # entries not seen yet.
+        history = order.get("history") or []
+        start = self.seen.get(order["id"], 0)
+        previous, entered = history[start - 1] if start else ("Pending", order.get("created"))
+        self.seen[order["id"]] = len(history)
+        moves = []
+        for status, at in history[start:]:
+            moves.append((at, status, previous, entered, order))
+            previous, entered = status, at
+        return moves
+
+    def observe(self, order):
+        for move in self.new_moves(order):
+            self.apply(*move)
+
+    def apply(self, at, status, previous, entered, order):
+        if status == "Prepping" and previous == "Pending":
+            # Timed from when this order was both waiting and next in line,
+            # so an idle kitchen does not count as a slow one.
+            since = max(self.last_start or "", order.get("created") or at)
+            self.start_gap = ewma(self.start_gap, max(seconds_between(since, at), 0), self.alpha)
+            self.last_start = max(self.last_start or "", at)
+        elif status == "Pick-Up" and previous == "Prepping" and entered:
+            keys = item_keys(order)
+            if not keys:
+                return
+            share = max(seconds_between(entered, at), 0) / len(keys)
+            for key in keys:
+                self.item_seconds[key] = ewma(self.item_seconds.get(key), share, self.alpha)
+            self.any_item = ewma(self.any_item, share, self.alpha)
+
+    def cook_seconds(self, order):
+        fallback = self.any_item if self.any_item is not None else DEFAULT_ITEM_SECONDS
+        return sum(self.item_seconds.get(key, fallback) for key in item_keys(order))
+
+    def wait_seconds(self, pending_ahead):
+        gap = self.start_gap if self.start_gap is not None else DEFAULT_START_GAP
+        return (pending_ahead + 1) * gap
+
+    def ready_at(self, order, pending_ahead, now=None):
+        now = now or datetime.now()
+        return now + timedelta(seconds=self.wait_seconds(pending_ahead) + self.cook_seconds(order))
+
+    def report(self):
+        gap = self.start_gap if self.start_gap is not None else DEFAULT_START_GAP
+        lines = [f"Start gap: {gap / 60:.1f}m", "Cook time per item:"]
+        for key in sorted(self.item_seconds, key=lambda key: -self.item_seconds[key]):
+            lines.append(f"   {key.partition(':')[2]}: {self.item_seconds[key] / 60:.1f}m")
+        return "\n".join(lines)
+
+
+def main():
+    from order_archive import orders_between, today
+    from order_store import open_store
+
+    parser = argparse.ArgumentParser(description="Show what the pickup-time estimator has learned")
+    parser.add_argument("--from", dest="start", default=None, help="first business day (YYYY-MM-DD), default today")
+    parser.add_argument("--to", dest="end", default=None, help="last business day, default the first")
+    args = parser.parse_args()
+
+    start = args.start or today()
+    store = open_store()
+    store.load()
+    estimator = PickupEstimator(orders_between(start, args.end or start, store))
+    pending = len(store.with_status("Pending"))
+    store.close()
+    print(estimator.report())
+    print(f"Pending now: {pending}    New order wait before cooking: {estimator.wait_seconds(pending) / 60:.1f}m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from kitchen_core import HEALTHY_MEAL, meal_parts
+
+# Orders in these columns still have food to cook.
+PREP_STATUSES = ("Pending", "Prepping")
+PREP_SECTIONS = (("meat", "Meats"), ("side", "Sides"), ("healthy", "Healthy Meals"))
+
+
+def prep_items(order):
+    for meal in order.get("meals", []):
+        if meal.get("meal_type") == HEALTHY_MEAL:
+            yield "healthy", meal["details"]
+            continue
+        meat, side = meal_parts(meal)
+        if meat:
+            yield "meat", meat
+        if side:
+            yield "side", side
+
+
+class PrepSummary:
+    # Live counts of everything still to cook. An order's items are added when
+    # it enters a prep column and taken back out when it leaves, so a move
+    # only ever looks at the one order that moved.
+    def __init__(self, orders=()):
+        self.counted = {}
+        self.counts = {kind: {} for kind, _ in PREP_SECTIONS}
+        for order in orders:
+            self.update(order)
+
+    def update(self, order):
+        oid = order["id"]
+        active = order.get("status", "Pending") in PREP_STATUSES
+        if active == (oid in self.counted):
+            return False
+        if active:
+            self.counted[oid] = tuple(prep_items(order))
+            self.tally(self.counted[oid], 1)
+        else:
+            self.tally(self.counted.pop(oid), -1)
+        return True
+
+    def remove(self, oid):
+        # For orders that left the store altogether (archived or reset).
+        if oid not in self.counted:
+            return False
+        self.tally(self.counted.pop(oid), -1)
+        return True
+
+    def tally(self, items, delta):
+        for kind, name in items:
+            totals = self.counts[kind]
+            totals[name] = totals.get(name, 0) + delta
+            if not totals[name]:
+                del totals[name]
+
+    def report(self):
+        lines = [f"Orders to cook: {len(self.counted)}"]
+        for kind, title in PREP_SECTIONS:
+            totals = self.counts[kind]
+            if not totals:
+                continue
+            lines.append("")
+            lines.append(f"{title}:")
+            for name in sorted(totals, key=lambda n: (-totals[n], n)):
+                lines.append(f"   {totals[name]} x {name}")
+        return "\n".join(lines)
@@ -0,0 +1,84 @@
+from kitchen_core import VOID_STATUS, meal_parts
+from order_records import Meal, format_cents
+
+
+def order_hour(order):
+    created = order.get("created", "")
+    return f"{created[11:13]}:00" if len(created) >= 13 else "Unknown"
+
+
+def bump(totals, key, price, sign=1):
+    entry = totals.setdefault(key, [0, 0])
+    entry[0] += sign
+    entry[1] += sign * price
+    if not entry[0]:
+        del totals[key]
+
+
+def order_lines(number, order):
+    lines = [f"{number}. {order['name']} ({order['phone']}):"]
+    for meal in order.get("meals", []):
+        note = f" [Note: {meal['note']} (+${meal['extra_price']:.2f})]" if meal.get("note") else ""
+        lines.append(f"   - {meal['meal_type']}: {meal['details']} (${meal['price']:.2f}){note}")
+    return lines
+
+
+class SalesSummary:
+    def __init__(self, orders=()):
+        self.seen = set()
+        # Money is summed in integer cents so totals never drift.
+        self.total = 0
+        self.order_count = 0
+        self.meal_count = 0
+        self.by_meal_type = {}
+        self.by_meat = {}
+        self.by_side = {}
+        self.by_hour = {}
+        for order in orders:
+            self.add_order(order)
+
+    def add_order(self, order):
+        if order["id"] in self.seen or order.get("status") == VOID_STATUS:
+            return
+        self.seen.add(order["id"])
+        self.count(order, 1)
+
+    def remove_order(self, order):
+        # A voided order comes back out of every total it went into.
+        if order["id"] not in self.seen:
+            return
+        self.seen.discard(order["id"])
+        self.count(order, -1)
+
+    def count(self, order, sign):
+        self.order_count += sign
+        hour = order_hour(order)
+        for meal in order.get("meals", []):
+            meal = Meal.from_dict(meal)
+            price = meal.price_cents
+            self.total += sign * price
+            self.meal_count += sign
+            bump(self.by_meal_type, meal.meal_type, price, sign)
+            bump(self.by_hour, hour, price, sign)
+            meat, side = meal_parts(meal)
+            if meat:
+                bump(self.by_meat, meat, price, sign)
+            if side:
+                bump(self.by_side, side, price, sign)
+
+    def report(self):
+        lines = [
+            f"Orders: {self.order_count}    Meals: {self.meal_count}",
+            f"Total Sales: {format_cents(self.total)}",
+        ]
+        for title, totals in (("By Meal Type", self.by_meal_type), ("By Meat", self.by_meat),
+                              ("By Side", self.by_side), ("By Hour", self.by_hour)):
+            if not totals:
+                continue
+            lines.append("")
+            lines.append(f"{title}:")
+            keys = sorted(totals) if totals is self.by_hour else sorted(totals, key=lambda k: -totals[k][1])
+            for key in keys:
+                count, total = totals[key]
+                lines.append(f"   {key}: {count} x  {format_cents(total)}")
+        return "\n".join(lines)
@@ -0,0 +1,400 @@
+import argparse
+import contextlib
+import json
+import sqlite3
+
+from order_archive import archive_orders, day_start, today
+from order_index import LEGACY_ID_PREFIX, OrderIndex, content_id, new_order_id, now_stamp
+from order_store import StaleOrderError, load_orders
+
+DB_FILE = "kitchen.db"
+IMPORT_BATCH = 1000
+# Orders read per query when streaming a date range out.
+EXPORT_PAGE = 1000
+# Change-feed rows kept after compaction so a lagging board can still catch up.
+KEEP_EVENTS = 10000
+
+ORDER_COLUMNS = ("id", "created", "name", "phone", "status", "version")
+MEAL_COLUMNS = ("meal_type", "details", "note", "extra_price", "price")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id TEXT PRIMARY KEY,
+    created TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL DEFAULT '',
+    phone TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'Pending',
+    version INTEGER NOT NULL DEFAULT 0,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS orders_status ON orders (status);
+CREATE INDEX IF NOT EXISTS orders_created ON orders (created);
+
+CREATE TABLE IF NOT EXISTS meals (
+    order_id TEXT NOT NULL REFERENCES orders (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    meal_type TEXT NOT NULL DEFAULT '',
+    details TEXT NOT NULL DEFAULT '',
+    note TEXT NOT NULL DEFAULT '',
+    extra_price REAL NOT NULL DEFAULT 0,
+    price REAL NOT NULL DEFAULT 0,
+    extra TEXT,
+    PRIMARY KEY (order_id, position)
+);
+
+CREATE TABLE IF NOT EXISTS menu_items (
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    price REAL,
+    PRIMARY KEY (section, position)
+);
+
+-- One row, bumped by every menu change, so a hot-reload check never has to
+-- re-read the menu when only orders were written.
+CREATE TABLE IF NOT EXISTS menu_version (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS order_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id TEXT NOT NULL
+);
+"""
+
+
+def connect(path=DB_FILE):
+    # The store may be driven from a write-behind thread; WriteBehind makes
+    # sure only one thread uses it at a time.
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+@contextlib.contextmanager
+def transaction(conn, mode="IMMEDIATE"):
+    # Nested blocks join the outer transaction, so a batch commits once.
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def extra_json(record, columns):
+    extra = {key: value for key, value in record.items() if key not in columns and key != "meals"}
+    return json.dumps(extra) if extra else None
+
+
+def order_row(order):
+    return (
+        order["id"],
+        order.get("created", ""),
+        order.get("name", ""),
+        order.get("phone", ""),
+        order.get("status", "Pending"),
+        order.get("version", 0),
+        extra_json(order, ORDER_COLUMNS),
+    )
+
+
+def meal_rows(order):
+    return [
+        (
+            order["id"],
+            position,
+            meal.get("meal_type", ""),
+            meal.get("details", ""),
+            meal.get("note", ""),
+            meal.get("extra_price", 0.0),
+            meal.get("price", 0.0),
+            extra_json(meal, MEAL_COLUMNS),
+        )
+        for position, meal in enumerate(order.get("meals", []))
+    ]
+
+
+def row_to_dict(row, columns):
+    record = {column: row[column] for column in columns}
+    if row["extra"]:
+        record.update(json.loads(row["extra"]))
+    return record
+
+
+def insert_orders(conn, orders):
+    # INSERT OR IGNORE keeps a re-run import from duplicating orders; the
+    # count of orders actually inserted comes back.
+    inserted = conn.executemany("INSERT OR IGNORE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)", [order_row(order) for order in orders]).rowcount
+    conn.executemany("INSERT OR IGNORE INTO meals VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [row for order in orders for row in meal_rows(order)])
+    conn.executemany("INSERT INTO order_events (order_id) VALUES (?)", [(order["id"],) for order in orders])
+    return inserted
+
+
+def fetch_orders(conn, where="", params=()):
+    orders = {}
+    for row in conn.execute(f"SELECT * FROM orders {where} ORDER BY rowid", params):
+        order = row_to_dict(row, ORDER_COLUMNS)
+        order["meals"] = []
+        orders[order["id"]] = order
+    if not orders:
+        return []
+
+    if where:
+        meal_query = f"SELECT * FROM meals WHERE order_id IN (SELECT id FROM orders {where}) ORDER BY order_id, position"
+    else:
+        meal_query = "SELECT * FROM meals ORDER BY order_id, position"
+    for row in conn.execute(meal_query, params):
+        orders[row["order_id"]]["meals"].append(row_to_dict(row, MEAL_COLUMNS))
+    return list(orders.values())
+
+
+def stream_orders(conn, start, end, page=EXPORT_PAGE):
+    # Keyset pages along the created index, which is ordered by (created,
+    # rowid), so only one page of orders and their meals is held at a time.
+    created, rowid = start, 0
+    while True:
+        rows = conn.execute("SELECT rowid, * FROM orders WHERE created >= ? AND created < ? AND NOT (created = ? AND rowid <= ?) "
+                            "ORDER BY created, rowid LIMIT ?", (created, end, created, rowid, page)).fetchall()
+        if not rows:
+            return
+        orders = {}
+        for row in rows:
+            order = row_to_dict(row, ORDER_COLUMNS)
+            order["meals"] = []
+            orders[order["id"]] = order
+        ids = list(orders)
+        for row in conn.execute(f"SELECT * FROM meals WHERE order_id IN ({','.join('?' * len(ids))}) ORDER BY order_id, position", ids):
+            orders[row["order_id"]]["meals"].append(row_to_dict(row, MEAL_COLUMNS))
+        yield from orders.values()
+        created, rowid = rows[-1]["created"], rows[-1]["rowid"]
+
+
+def load_menu(path=DB_FILE):
+    conn = connect(path)
+    try:
+        rows = conn.execute("SELECT section, name, price FROM menu_items ORDER BY section, position").fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return None
+
+    menu = {"healthy_meal": {"name": {}}, "todays_special": {"meats": {}, "sides": []}}
+    for row in rows:
+        if row["section"] == "healthy":
+            menu["healthy_meal"]["name"][row["name"]] = row["price"]
+        elif row["section"] == "meat":
+            menu["todays_special"]["meats"][row["name"]] = row["price"]
+        elif row["section"] == "side":
+            menu["todays_special"]["sides"].append(row["name"])
+    return menu
+
+
+def save_menu(menu, path=DB_FILE):
+    rows = [("healthy", i, name, price) for i, (name, price) in enumerate(menu["healthy_meal"]["name"].items())]
+    rows += [("meat", i, name, price) for i, (name, price) in enumerate(menu["todays_special"]["meats"].items())]
+    rows += [("side", i, name, None) for i, name in enumerate(menu["todays_special"]["sides"])]
+    conn = connect(path)
+    try:
+        with transaction(conn):
+            conn.execute("DELETE FROM menu_items")
+            conn.executemany("INSERT INTO menu_items VALUES (?, ?, ?, ?)", rows)
+            bump_menu_version(conn)
+    finally:
+        conn.close()
+
+
+def bump_menu_version(conn):
+    conn.execute("INSERT INTO menu_version VALUES (0, 1) ON CONFLICT (id) DO UPDATE SET version = version + 1")
+
+
+def menu_version(path=DB_FILE):
+    # A bare connection and one row: this runs on every hot-reload tick.
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        row = conn.execute("SELECT version FROM menu_version").fetchone()
+    except sqlite3.OperationalError:
+        # Created with the rest of the schema on the first connect().
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def import_orders(orders, path=DB_FILE, batch_size=IMPORT_BATCH):
+    conn = connect(path)
+    inserted = 0
+    try:
+        for start in range(0, len(orders), batch_size):
+            with transaction(conn):
+                inserted += insert_orders(conn, orders[start:start + batch_size])
+    finally:
+        conn.close()
+    return inserted
+
+
+def stable_ids(orders):
+    # Positional legacy ids repeat from one old file to the next, so they
+    # are swapped for ids taken from each order's content.
+    for order in orders:
+        if order["id"].startswith(LEGACY_ID_PREFIX):
+            fields = order.to_dict()
+            del fields["id"]
+            order.id = content_id(fields)
+    return orders
+
+
+class SqliteOrderStore:
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = connect(path)
+        self.index = OrderIndex()
+        self.orders = self.index.orders
+        self.event_seq = 0
+        self.data_version = None
+
+    def close(self):
+        self.conn.close()
+
+    def load(self):
+        with transaction(self.conn, "DEFERRED"):
+            self.event_seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM order_events").fetchone()[0]
+            # Older finished orders stay on disk; created_between() reaches them.
+            self.index = OrderIndex(fetch_orders(self.conn, "WHERE status NOT IN ('Finished', 'Voided') OR created >= ?", (day_start(today()),)))
+            self.data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        self.orders = self.index.orders
+        return self.orders
+
+    def roll_over(self, day=None):
+        # Older finished orders already stay out of the loaded index.
+        return 0
+
+    def poll(self):
+        # data_version only moves when another connection commits, so an idle
+        # poll is a single pragma read.
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self.data_version:
+            return []
+        self.data_version = data_version
+
+        rows = self.conn.execute("SELECT seq, order_id FROM order_events WHERE seq > ? ORDER BY seq", (self.event_seq,)).fetchall()
+        if not rows:
+            return []
+        self.event_seq = rows[-1]["seq"]
+        ids = list(dict.fromkeys(row["order_id"] for row in rows))
+        placeholders = ",".join("?" * len(ids))
+        found = set()
+        for fresh in fetch_orders(self.conn, f"WHERE id IN ({placeholders})", ids):
+            self.remember(fresh)
+            found.add(fresh["id"])
+        # Ids with no row left were reset away by another connection; like
+        # OrderStore.poll() they come last and get() returns None for them.
+        gone = {oid for oid in ids if oid not in found and oid in self.index}
+        if gone:
+            self.index = OrderIndex([order for order in self.index.orders if order["id"] not in gone])
+            self.orders = self.index.orders
+        end = len(self.index)
+        return sorted((oid for oid in ids if oid in self.index or oid in gone), key=lambda oid: self.index.position.get(oid, end))
+
+    def remember(self, fresh):
+        if fresh["id"] in self.index:
+            if self.index.get(fresh["id"]) != fresh:
+                self.index.replace(fresh["id"], fresh)
+        else:
+            self.index.add(fresh)
+
+    def get(self, oid):
+        return self.index.get(oid)
+
+    def with_status(self, status):
+        return fetch_orders(self.conn, "WHERE status = ?", (status,))
+
+    def created_between(self, start, end):
+        return stream_orders(self.conn, start, end)
+
+    def add_order(self, order):
+        return self.add_orders([order])[0]
+
+    def add_orders(self, orders):
+        for order in orders:
+            order.setdefault("id", new_order_id())
+        with transaction(self.conn):
+            insert_orders(self.conn, orders)
+        return [self.index.add(order) or order["id"] for order in orders]
+
+    def set_status(self, oid, status, expected_version=None):
+        at = now_stamp()
+        with transaction(self.conn):
+            row = self.conn.execute("SELECT status, version, extra FROM orders WHERE id = ?", (oid,)).fetchone()
+            if row is None:
+                raise KeyError(oid)
+            version = row["version"]
+            if expected_version is not None and version != expected_version:
+                raise StaleOrderError(f"Order {oid} is at version {version}, expected {expected_version}.")
+            extra = json.loads(row["extra"]) if row["extra"] else {}
+            if row["status"] != status:
+                extra.setdefault("history", []).append([status, at])
+            self.conn.execute("UPDATE orders SET status = ?, version = ?, extra = ? WHERE id = ?",
+                              (status, version + 1, json.dumps(extra) if extra else None, oid))
+            self.conn.execute("INSERT INTO order_events (order_id) VALUES (?)", (oid,))
+        if oid in self.index:
+            self.index.set_status(oid, status, version + 1, at)
+        else:
+            self.remember(fetch_orders(self.conn, "WHERE id = ?", (oid,))[0])
+        return oid
+
+    @contextlib.contextmanager
+    def batch(self):
+        with transaction(self.conn):
+            yield
+
+    def compact(self):
+        with transaction(self.conn):
+            self.conn.execute("DELETE FROM order_events WHERE seq <= (SELECT MAX(seq) FROM order_events) - ?", (KEEP_EVENTS,))
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def reset(self):
+        with transaction(self.conn):
+            orders = fetch_orders(self.conn)
+            archive_orders(orders)
+            self.conn.execute("DELETE FROM meals")
+            self.conn.execute("DELETE FROM orders")
+            self.conn.execute("DELETE FROM menu_items")
+            bump_menu_version(self.conn)
+            self.conn.execute("DELETE FROM order_events")
+            # The change feed tells other stores which orders went.
+            self.conn.executemany("INSERT INTO order_events (order_id) VALUES (?)", [(order["id"],) for order in orders])
+            self.event_seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM order_events").fetchone()[0]
+        self.index = OrderIndex()
+        self.orders = self.index.orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import orders.json and menu.json into the SQLite backend")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite database to import into")
+    parser.add_argument("--orders", default="orders.json", help="orders snapshot to import (its journal is replayed too)")
+    parser.add_argument("--menu", default="menu.json", help="menu file to import")
+    args = parser.parse_args()
+
+    orders = stable_ids(load_orders(args.orders, args.orders.rsplit(".", 1)[0] + ".journal"))
+    imported = import_orders(orders, args.db)
+    print(f"Imported {imported} orders into {args.db}, skipped {len(orders) - imported} already present")
+    try:
+        with open(args.menu, "r") as f:
+            save_menu(json.load(f), args.db)
+        print(f"Imported menu from {args.menu}")
+    except FileNotFoundError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
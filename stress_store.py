@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import time
+
+from kitchen_core import next_status
+from order_index import new_order_id, now_stamp
+from order_store import OrderStore, StaleOrderError, load_orders
+
+
+def open_store(workdir, compact_bytes):
+    store = OrderStore(os.path.join(workdir, "orders.json"), os.path.join(workdir, "orders.journal"), compact_bytes=compact_bytes)
+    store.load()
+    return store
+
+
+def counter_worker(workdir, worker, count, compact_bytes):
+    store = open_store(workdir, compact_bytes)
+    for i in range(count):
+        store.add_order({"id": new_order_id(), "created": now_stamp(), "name": f"counter{worker}-{i}", "phone": str(worker), "meals": [], "status": "Pending"})
+    store.close()
+
+
+def board_worker(workdir, worker, moves, compact_bytes, results):
+    store = open_store(workdir, compact_bytes)
+    rng = random.Random(worker)
+    applied = {}
+    conflicts = 0
+    while sum(applied.values()) < moves:
+        store.poll()
+        if not store.orders:
+            time.sleep(0.001)
+            continue
+        order = store.orders[rng.randrange(len(store.orders))]
+        try:
+            store.set_status(order["id"], next_status(order["status"]), expected_version=order.get("version", 0))
+        except StaleOrderError:
+            conflicts += 1
+            continue
+        applied[order["name"]] = applied.get(order["name"], 0) + 1
+    store.close()
+    results.put((applied, conflicts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hammer the order store from several processes at once")
+    parser.add_argument("--counters", type=int, default=4, help="processes creating orders")
+    parser.add_argument("--boards", type=int, default=4, help="processes moving orders")
+    parser.add_argument("--orders", type=int, default=500, help="orders created per counter process")
+    parser.add_argument("--moves", type=int, default=500, help="status moves per board process")
+    parser.add_argument("--compact-bytes", type=int, default=16 * 1024, help="journal size that triggers compaction")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for each process")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=counter_worker, args=(workdir, i, args.orders, args.compact_bytes))
+            for i in range(args.counters)
+        ] + [
+            multiprocessing.Process(target=board_worker, args=(workdir, i, args.moves, args.compact_bytes, results))
+            for i in range(args.boards)
+        ]
+
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        moves = {}
+        conflicts = 0
+        errors = []
+        for _ in range(args.boards):
+            try:
+                applied, worker_conflicts = results.get(timeout=args.timeout)
+            except queue.Empty:
+                errors.append("a board process crashed or stalled")
+                break
+            conflicts += worker_conflicts
+            for name, count in applied.items():
+                moves[name] = moves.get(name, 0) + count
+        for process in processes:
+            process.join(args.timeout)
+            if process.is_alive():
+                process.terminate()
+            if process.exitcode:
+                errors.append(f"{process.name} exited with code {process.exitcode}")
+        elapsed = time.perf_counter() - start
+
+        orders = load_orders(os.path.join(workdir, "orders.json"), os.path.join(workdir, "orders.journal"))
+
+    names = [order["name"] for order in orders]
+    if len(names) != args.counters * args.orders:
+        errors.append(f"expected {args.counters * args.orders} orders, found {len(names)}")
+    if len(set(names)) != len(names):
+        errors.append(f"{len(names) - len(set(names))} duplicated orders")
+    lost = sum(1 for order in orders if order.get("version", 0) != moves.get(order["name"], 0))
+    if lost:
+        errors.append(f"{lost} orders whose version does not match the moves applied to them")
+
+    writes = len(names) + sum(moves.values())
+    print(f"{writes} writes from {len(processes)} processes in {elapsed:.2f}s "
+          f"({writes / elapsed:.0f} writes/s, {conflicts} stale moves rejected)")
+    for error in errors:
+        print(f"FAIL: {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,44 +1,62 @@
+import bisect
 import tkinter as tk
-from tkinter import ttk
-import json
-import os
-
-ORDERS_FILE = "orders.json"
-STATUS_ORDER = ["Pending", "Prepping", "Pick-Up", "Finished"]
+from tkinter import ttk, messagebox
+from action_log import ActionLog, UndoStack
+from kitchen_core import STATUS_ORDER
+from order_store import StaleOrderError, open_store
+from prep_summary import PrepSummary
+from write_behind import WriteBehind
+
+POLL_MS = 500
+CARD_HEIGHT = 130
+# Only the most recent finished orders get a card; older ones are just counted.
+FINISHED_VISIBLE = 20
 
 class DragCard(ttk.Frame):
-    def __init__(self, master, order_id, order, move_callback):
+    def __init__(self, master, move_callback):
         super().__init__(master, relief="raised", borderwidth=2)
-        self.order_id = order_id
-        self.order = order
+        self.order_id = None
+        self.order = None
+        self.status = None
+        self.version = None
         self.move_callback = move_callback
+        self.item = None
+        self.ghost = None
+        self.dragged = None
 
         self.configure(width=220)
+        self.pack_propagate(False)
 
-        self.label = ttk.Label(self, text=f"{order['name']} – {len(order['meals'])} meals", wraplength=200)
+        self.label = ttk.Label(self, wraplength=200)
         self.label.pack(padx=5, pady=(5, 0), fill="x")
 
         self.details_frame = ttk.Frame(self)
         self.details_frame.pack(fill="x")
 
-        meals_text = "\n".join(
-            f"- {meal['meal_type']}: {meal['details']} (${meal['price']:.2f})" + 
-            (f" [Note: {meal['note']}]" if meal.get("note") else "")
-            for meal in self.order.get("meals", [])
-        )
-
-        details_text = (
-            f"Phone: {self.order.get('phone', '')}\n"
-            f"Meals:\n{meals_text}\n"
-            f"Status: {self.order.get('status', 'Pending')}"
-        )
-
-        self.details_label = ttk.Label(self.details_frame, text=details_text, justify="left", wraplength=200)
+        self.details_prefix = ""
+        self.details_label = ttk.Label(self.details_frame, justify="left", wraplength=200)
         self.details_label.pack(padx=5, pady=(0, 5), fill="x")
 
         self.bind_events()
-        self.start_x = 0
-        self.start_y = 0
+
+    def show(self, order_id, order):
+        # Cards are pooled per column and re-pointed at whichever orders
+        # scroll into view; skip the relabel if nothing changed.
+        if order_id == self.order_id and order.get("version", 0) == self.version:
+            return
+        self.order_id = order_id
+        self.order = order
+        title, self.details_prefix = order.card()
+        self.label.config(text=title)
+        self.update_status()
+
+    def details_text(self):
+        return f"{self.details_prefix}Status: {self.status}"
+
+    def update_status(self):
+        self.status = self.order.get("status", "Pending")
+        self.version = self.order.get("version", 0)
+        self.details_label.config(text=self.details_text())
 
     def bind_events(self):
         widgets = [self, self.label, self.details_label, self.details_frame]
@@ -48,16 +66,29 @@ class DragCard(ttk.Frame):
             widget.bind("<ButtonRelease-1>", self.on_drop)
 
     def on_click(self, event):
-        self.start_x = event.x
-        self.start_y = event.y
-        self.lift()
+        # The card itself stays in its slot; a lightweight label follows the
+        # pointer so pooled cards never leave their canvas. The order is
+        # pinned here: a poll can re-point this card at another order before
+        # the drop.
+        self.dragged = (self.order_id, self.version)
+        root = self.winfo_toplevel()
+        self.ghost = ttk.Label(root, text=self.label.cget("text"), relief="raised", padding=5)
+        self.ghost.place(x=event.x_root - root.winfo_rootx(), y=event.y_root - root.winfo_rooty())
 
     def on_drag(self, event):
-        dx = event.x - self.start_x
-        dy = event.y - self.start_y
-        self.place_configure(x=self.winfo_x() + dx, y=self.winfo_y() + dy)
+        if self.ghost is not None:
+            root = self.winfo_toplevel()
+            self.ghost.place_configure(x=event.x_root - root.winfo_rootx(), y=event.y_root - root.winfo_rooty())
 
     def on_drop(self, event):
+        if self.ghost is not None:
+            self.ghost.destroy()
+            self.ghost = None
+        if self.dragged is None:
+            return
+        order_id, version = self.dragged
+        self.dragged = None
+
         root = self.winfo_toplevel()
         for status, canvas in root.canvases.items():
             fx = canvas.winfo_rootx()
@@ -67,24 +98,32 @@ class DragCard(ttk.Frame):
             mx, my = self.winfo_pointerxy()
 
             if fx <= mx <= fx + fw and fy <= my <= fy + fh:
-                self.move_callback(self.order_id, status)
+                self.move_callback(order_id, status, version)
                 return
 
-        self.move_callback(self.order_id, self.order.get("status", "Pending"))
-
 class TrackingApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Order Tracking – Drag Anywhere")
-        self.geometry("1100x500")
-        self.frames = {}
-        self.cards = {}
+        self.geometry("1300x500")
+        self.pools = {status: [] for status in STATUS_ORDER}
+        self.columns = {status: [] for status in STATUS_ORDER}
+        self.placed = {}
         self.orders = {}
         self.canvases = {}
+        self.prep = PrepSummary()
+        self.store = open_store()
 
         self.grid_columnconfigure(tuple(range(len(STATUS_ORDER))), weight=1, uniform="status")
         self.setup_ui()
         self.load_orders()
+        self.writer = WriteBehind(self.store, self)
+        self.actions = ActionLog()
+        self.history = UndoStack()
+        self.bind("<Control-z>", self.undo)
+        self.bind("<Control-y>", self.redo)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(POLL_MS, self.poll_store)
 
     def setup_ui(self):
         for idx, status in enumerate(STATUS_ORDER):
@@ -93,60 +132,241 @@ class TrackingApp(tk.Tk):
             container.grid_propagate(False)
             container.configure(width=250, height=480)
 
+            if status == "Finished":
+                self.hidden_label = ttk.Label(container)
+                self.hidden_label.pack(side="top", fill="x", padx=5)
+
             canvas = tk.Canvas(container, width=250, height=450)
             canvas.pack(side="left", fill="both", expand=True)
 
             scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
             scrollbar.pack(side="right", fill="y")
 
-            scrollable_frame = ttk.Frame(canvas)
-            canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-            canvas.configure(yscrollcommand=scrollbar.set)
-
-            def on_frame_configure(event, c=canvas):
-                c.configure(scrollregion=c.bbox("all"))
+            def on_scroll(first, last, s=status, bar=scrollbar):
+                bar.set(first, last)
+                self.render_column(s)
 
-            scrollable_frame.bind("<Configure>", on_frame_configure)
+            canvas.configure(yscrollcommand=on_scroll, yscrollincrement=CARD_HEIGHT // 4)
+            canvas.bind("<Configure>", lambda e, s=status: self.resize_column(s))
 
             canvas.bind("<Enter>", lambda e, c=canvas: c.bind_all("<MouseWheel>", lambda ev: c.yview_scroll(int(-1 * (ev.delta / 120)), "units")))
             canvas.bind("<Leave>", lambda e, c=canvas: c.unbind_all("<MouseWheel>"))
 
             self.canvases[status] = canvas
-            self.frames[status] = scrollable_frame
+
+        prep_frame = ttk.LabelFrame(self, text="Prep Totals")
+        prep_frame.grid(row=0, column=len(STATUS_ORDER), padx=5, pady=10, sticky="ns")
+        self.prep_label = ttk.Label(prep_frame, justify="left", anchor="nw", width=28)
+        self.prep_label.pack(fill="both", expand=True, padx=5, pady=5)
 
     def load_orders(self):
-        if os.path.exists(ORDERS_FILE):
-            with open(ORDERS_FILE, "r") as f:
-                data = json.load(f) or []
-        else:
-            data = []
-        self.orders = {i: o for i, o in enumerate(data)}
+        self.store.load()
+        self.store.roll_over()
+        data = self.store.orders
+        self.orders = {order["id"]: order for order in data}
+        self.prep = PrepSummary(data)
+        self.show_prep()
         self.redraw()
 
-    def redraw(self):
-        for card in self.cards.values():
-            card.destroy()
-        self.cards.clear()
+    def show_prep(self):
+        self.prep_label.config(text=self.prep.report())
 
-        for frame in self.frames.values():
-            for widget in frame.winfo_children():
-                widget.destroy()
+    def update_prep(self, oid):
+        if self.prep.update(self.orders[oid]):
+            self.show_prep()
 
-        for i, (oid, order) in enumerate(self.orders.items()):
-            status = order.get("status", "Pending")
-            frame = self.frames.get(status)
-            card = DragCard(self, oid, order, self.move_order)
-            card.pack(in_=frame, fill="x", pady=5, padx=5)
-            self.cards[oid] = card
-
-    def move_order(self, oid, new_status):
-        self.orders[oid]["status"] = new_status
-        self.save_orders()
-        self.redraw()
+    def redraw(self):
+        # Only the column lists are rebuilt here; cards are drawn lazily for
+        # whatever is scrolled into view.
+        for column in self.columns.values():
+            column.clear()
+        self.placed.clear()
 
-    def save_orders(self):
-        with open(ORDERS_FILE, "w") as f:
-            json.dump(list(self.orders.values()), f, indent=2)
+        for oid, order in self.orders.items():
+            status = order.get("status", "Pending")
+            if status not in self.columns:
+                continue
+            self.columns[status].append(self.sort_key(oid))
+            self.placed[oid] = status
+
+        for status in STATUS_ORDER:
+            self.columns[status].sort()
+            self.update_column_size(status)
+            self.render_column(status)
+
+    def sort_key(self, oid):
+        # Creation time rather than index position: positions shift when
+        # another process archives orders out of the store.
+        return (self.orders[oid].get("created") or "", oid)
+
+    def visible_range(self, status):
+        column = self.columns[status]
+        if status == "Finished":
+            return max(len(column) - FINISHED_VISIBLE, 0), len(column)
+        return 0, len(column)
+
+    def card_width(self, status):
+        canvas = self.canvases[status]
+        return max(canvas.winfo_width(), int(canvas.cget("width"))) - 10
+
+    def update_column_size(self, status):
+        start, end = self.visible_range(status)
+        self.canvases[status].configure(scrollregion=(0, 0, self.card_width(status), (end - start) * CARD_HEIGHT))
+        if status == "Finished":
+            self.hidden_label.config(text=f"+ {start} older finished orders" if start else "")
+
+    def resize_column(self, status):
+        for card in self.pools[status]:
+            self.canvases[status].itemconfigure(card.item, width=self.card_width(status))
+        self.update_column_size(status)
+        self.render_column(status)
+
+    def render_column(self, status):
+        canvas = self.canvases[status]
+        column = self.columns[status]
+        start, end = self.visible_range(status)
+        top = canvas.canvasy(0)
+        first = max(int(top // CARD_HEIGHT), 0)
+        last = min(int((top + canvas.winfo_height()) // CARD_HEIGHT) + 1, end - start)
+
+        pool = self.pools[status]
+        while len(pool) < last - first:
+            card = DragCard(canvas, self.move_order)
+            card.item = canvas.create_window(5, 0, window=card, anchor="nw",
+                                             width=self.card_width(status), height=CARD_HEIGHT - 10)
+            pool.append(card)
+
+        for slot, card in enumerate(pool):
+            row = first + slot
+            if row < last:
+                oid = column[start + row][1]
+                card.show(oid, self.orders[oid])
+                canvas.coords(card.item, 5, row * CARD_HEIGHT + 5)
+                canvas.itemconfigure(card.item, state="normal")
+            else:
+                canvas.itemconfigure(card.item, state="hidden")
+
+    def add_card(self, oid):
+        status = self.orders[oid].get("status", "Pending")
+        if status not in self.columns:
+            return
+        bisect.insort(self.columns[status], self.sort_key(oid))
+        self.placed[oid] = status
+        self.update_prep(oid)
+        self.update_column_size(status)
+        self.render_column(status)
+
+    def relocate_card(self, oid):
+        if oid not in self.placed:
+            # Voided or archived while a move was in flight; add_card puts it
+            # back only if the order is on the board again.
+            if oid in self.orders:
+                self.add_card(oid)
+            return
+        old_status = self.placed[oid]
+        new_status = self.orders[oid].get("status", "Pending")
+        if new_status not in self.columns:
+            # Voided at the counter: the card leaves the board.
+            self.remove_card(oid)
+            self.update_prep(oid)
+            return
+        if new_status != old_status:
+            old_column = self.columns[old_status]
+            del old_column[bisect.bisect_left(old_column, self.sort_key(oid))]
+            bisect.insort(self.columns[new_status], self.sort_key(oid))
+            self.placed[oid] = new_status
+            self.update_prep(oid)
+            self.update_column_size(old_status)
+            self.update_column_size(new_status)
+            self.render_column(old_status)
+        self.render_column(new_status)
+
+    def remove_card(self, oid):
+        status = self.placed.pop(oid)
+        column = self.columns[status]
+        del column[bisect.bisect_left(column, self.sort_key(oid))]
+        self.update_column_size(status)
+        self.render_column(status)
+
+    def drop_order(self, oid):
+        # Archived or reset away by another process.
+        if oid in self.placed:
+            self.remove_card(oid)
+        if self.prep.remove(oid):
+            self.show_prep()
+        self.orders.pop(oid, None)
+
+    def move_order(self, oid, new_status, expected_version=None):
+        old_status = self.placed.get(oid)
+        if old_status is None:
+            # The card left the board while it was being dragged.
+            return
+        if new_status == old_status:
+            self.relocate_card(oid)
+            return
+        # The write happens off the Tk thread; the card moves once it lands.
+        event = {"action": "move", "id": oid, "from": old_status, "to": new_status}
+        self.writer.set_status(oid, new_status, expected_version,
+                               done=lambda _: self.moved(event, record=True),
+                               failed=lambda error: self.move_failed(oid, error))
+
+    def moved(self, event, record=False):
+        self.relocate_card(event["id"])
+        if record:
+            self.history.push(event)
+        self.writer.submit(self.actions.record, event)
+
+    def undo(self, event=None):
+        self.apply_move(self.history.undo())
+        return "break"
+
+    def redo(self, event=None):
+        self.apply_move(self.history.redo())
+        return "break"
+
+    def apply_move(self, event):
+        if event is None:
+            return
+        self.writer.move_from(event["id"], event["from"], event["to"],
+                              done=lambda _: self.moved(event),
+                              failed=lambda error: self.undo_failed(event, error))
+
+    def undo_failed(self, event, error):
+        self.history.discard(event)
+        if isinstance(error, StaleOrderError):
+            messagebox.showwarning("Cannot Undo", "That order has been moved again since.")
+        else:
+            messagebox.showerror("Save Failed", f"The order could not be moved: {error}")
+        self.relocate_card(event["id"])
+
+    def move_failed(self, oid, error):
+        # Another terminal moved this order first; the card snaps to wherever
+        # the store says it is now.
+        if not isinstance(error, StaleOrderError):
+            messagebox.showerror("Save Failed", f"The order could not be moved: {error}")
+        self.relocate_card(oid)
+
+    def poll_store(self):
+        # Only orders journaled by the other app since the last poll come back
+        # here, so an idle board costs a couple of stat() calls per tick. A
+        # failed read is reported by Tk and retried on the next one.
+        try:
+            for oid in self.writer.poll():
+                order = self.store.get(oid)
+                if order is None:
+                    self.drop_order(oid)
+                elif oid in self.placed:
+                    self.relocate_card(oid)
+                else:
+                    self.orders[oid] = order
+                    self.add_card(oid)
+        finally:
+            self.after(POLL_MS, self.poll_store)
+
+    def on_close(self):
+        self.writer.close()
+        self.store.close()
+        self.destroy()
 
 if __name__ == "__main__":
     TrackingApp().mainloop()
@@ -0,0 +1,125 @@
+import atexit
+import queue
+import sys
+import threading
+
+from order_index import new_order_id
+from order_store import move_from
+
+DRAIN_MS = 20
+STOP = object()
+
+
+class WriteBehind:
+    # Every store write runs on one background thread so a slow disk never
+    # stalls the Tk event loop. Writes queued while a flush is running go out
+    # together in the next flush, and their callbacks come back to the Tk
+    # thread through after().
+    def __init__(self, store, root, on_error=None):
+        self.store = store
+        self.root = root
+        self.on_error = on_error
+        # Held by the worker while it touches the store; the Tk thread takes
+        # it around its own store reads.
+        self.mutex = threading.Lock()
+        self.pending = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+        self.root.after(DRAIN_MS, self.drain)
+
+    def add_order(self, order, done=None, failed=None):
+        order.setdefault("id", new_order_id())
+        self.submit(self.store.add_order, order, done=done, failed=failed)
+        return order["id"]
+
+    def set_status(self, oid, status, expected_version=None, done=None, failed=None):
+        self.submit(self.store.set_status, oid, status, expected_version, done=done, failed=failed)
+
+    def move_from(self, oid, from_status, to_status, done=None, failed=None):
+        self.submit(move_from, self.store, oid, from_status, to_status, done=done, failed=failed)
+
+    def submit(self, fn, *args, done=None, failed=None):
+        # Any other write that should stay off the Tk thread rides along in
+        # the same flush.
+        self.pending.put((fn, args, done, failed))
+
+    def poll(self):
+        # Skipped while a flush holds the store; the next tick catches up.
+        if not self.mutex.acquire(blocking=False):
+            return []
+        try:
+            return self.store.poll()
+        finally:
+            self.mutex.release()
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stop = STOP in batch
+            writes = [item for item in batch if item is not STOP]
+            if writes:
+                self.flush(writes)
+            if stop:
+                return
+
+    def flush(self, writes):
+        outcomes = []
+        with self.mutex:
+            try:
+                with self.store.batch():
+                    for fn, args, done, failed in writes:
+                        try:
+                            outcomes.append((done, failed, fn(*args), None))
+                        except Exception as exc:
+                            outcomes.append((done, failed, None, exc))
+            except Exception as exc:
+                # The flush itself failed, so none of the batch is on disk.
+                outcomes = [(done, failed, None, exc) for _, _, done, failed in writes]
+        for outcome in outcomes:
+            self.results.put(outcome)
+
+    def drain(self):
+        try:
+            while True:
+                try:
+                    outcome = self.results.get_nowait()
+                except queue.Empty:
+                    break
+                self.deliver(*outcome)
+        finally:
+            self.root.after(DRAIN_MS, self.drain)
+
+    def deliver(self, done, failed, result, error):
+        # A callback that raises is reported like any other Tk callback error
+        # and never holds up the ones after it.
+        try:
+            if error is None:
+                if done:
+                    done(result)
+            elif failed:
+                failed(error)
+            elif self.on_error:
+                self.on_error(error)
+        except Exception:
+            self.root.report_callback_exception(*sys.exc_info())
+
+    def sync(self):
+        # Blocks until everything queued so far is on disk and runs its
+        # callbacks now instead of on the next drain tick.
+        synced = []
+        self.submit(lambda: None, done=synced.append)
+        while not synced:
+            self.deliver(*self.results.get())
+
+    def close(self):
+        # Blocks until everything queued so far is on disk.
+        if self.thread.is_alive():
+            self.pending.put(STOP)
+            self.thread.join()